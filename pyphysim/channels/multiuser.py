@@ -15,13 +15,13 @@ model is shown in the Figure below.
 
 import math
 from numbers import Number
-from typing import Iterable, List, Optional, Tuple, TypeVar, Union, cast
+from typing import Any, Iterable, List, Optional, Tuple, TypeVar, Union, cast
 
 import numpy as np
 from scipy.linalg import block_diag
 
 from ..util.conversion import single_matrix_to_matrix_of_matrices
-from ..util.misc import randn_c_RS
+from ..util.misc import batched_herk, randn_c_RS
 from . import singleuser
 from .fading import TdlChannelProfile, TdlImpulseResponse
 from .fading_generators import JakesSampleGenerator, RayleighSampleGenerator
@@ -648,6 +648,17 @@ class MultiUserChannelMatrix:  # pylint: disable=R0902
         self._Nr = np.array([])
         self._Nt = np.array([])
         self._K: int = 0
+        # Cumulative sum (starting at zero) of _Nr and _Nt. These are the
+        # indexes where the block of each user starts in the big channel
+        # matrix and they are set whenever the channel is initialized.
+        self._cumNr = np.array([0])
+        self._cumNt = np.array([0])
+        # Channel of all users stacked as a 4D numpy array, where
+        # `_H_all_kl[k, l]` is the channel from transmitter `l` to receiver
+        # `k`. This is only possible (and it is only set) when all users
+        # have the same number of antennas. It is computed the first time
+        # get_all_Hkl is called.
+        self._H_all_kl: Optional[np.ndarray] = None
         self._pathloss_matrix: Optional[np.ndarray] = None
         # _pathloss_big_matrix should not be set directly. It is set when
         # _pathloss_matrix is set in the set_pathloss method.
@@ -921,15 +932,16 @@ class MultiUserChannelMatrix:  # pylint: disable=R0902
         if Kt is None:
             Kt = Kr
 
-        cumNr = np.hstack([0, np.cumsum(Nr)])
-        cumNt = np.hstack([0, np.cumsum(Nt)])
         big_matrix = np.ones(
             [int(np.sum(Nr)), int(np.sum(Nt))], dtype=small_matrix.dtype)
 
-        for rx in range(Kr):
-            for tx in range(Kt):
-                big_matrix[cumNr[rx]:cumNr[rx + 1], cumNt[tx]:cumNt[tx + 1]] \
-                    *= small_matrix[rx, tx]
+        # Repeat each row of `small_matrix` Nr[rx] times and each column
+        # Nt[tx] times, which expands all blocks at once
+        expanded = np.repeat(np.repeat(small_matrix[:Kr, :Kt], Nr[:Kr],
+                                       axis=0),
+                             Nt[:Kt],
+                             axis=1)
+        big_matrix[:expanded.shape[0], :expanded.shape[1]] = expanded
         return big_matrix
 
     def init_from_channel_matrix(self, channel_matrix: np.ndarray,
@@ -982,10 +994,13 @@ class MultiUserChannelMatrix:  # pylint: disable=R0902
         # called.
         self._big_H_with_pathloss = None
         self._H_with_pathloss = None
+        self._H_all_kl = None
 
         self._K = K
         self._Nr = Nr_array
         self._Nt = Nt_array
+        self._cumNr = np.hstack([0, np.cumsum(self._Nr)])
+        self._cumNt = np.hstack([0, np.cumsum(self._Nt)])
 
         self._big_H_no_pathloss = channel_matrix
 
@@ -1000,8 +1015,11 @@ class MultiUserChannelMatrix:  # pylint: disable=R0902
         self._big_H_no_pathloss.setflags(write=False)
         self._H_no_pathloss.setflags(write=False)
 
-    def randomize(self, Nr: IntOrIntArrayUnion, Nt: IntOrIntArrayUnion,
-                  K: int) -> None:
+    def randomize(self,
+                  Nr: IntOrIntArrayUnion,
+                  Nt: IntOrIntArrayUnion,
+                  K: int,
+                  dtype: Any = complex) -> None:
         """
         Generates a random channel matrix for all users.
 
@@ -1015,12 +1033,17 @@ class MultiUserChannelMatrix:  # pylint: disable=R0902
             specified, all users will have that number of receive antennas.
         K : int
             Number of users.
+        dtype : np.dtype, optional
+            The complex dtype of the channel. The default is `complex`
+            (complex128). Use `np.complex64` to perform the computations
+            that depend on the channel in single precision.
         """
         # Reset the _big_H_with_pathloss and _H_with_pathloss. They will be
         # correctly set the first time the _get_H or _get_big_H methods are
         # called.
         self._big_H_with_pathloss = None
         self._H_with_pathloss = None
+        self._H_all_kl = None
 
         if isinstance(Nr, int):
             Nr = np.ones(K, dtype=int) * Nr
@@ -1030,10 +1053,13 @@ class MultiUserChannelMatrix:  # pylint: disable=R0902
         self._Nr = Nr.astype(int)
         self._Nt = Nt.astype(int)
         self._K = int(K)
+        self._cumNr = np.hstack([0, np.cumsum(self._Nr)])
+        self._cumNt = np.hstack([0, np.cumsum(self._Nt)])
 
         self._big_H_no_pathloss = randn_c_RS(self._RS_channel,
                                              np.sum(self._Nr),
-                                             np.sum(self._Nt))
+                                             np.sum(self._Nt),
+                                             dtype=dtype)
 
         self._H_no_pathloss = single_matrix_to_matrix_of_matrices(
             self._big_H_no_pathloss, Nr, Nt)
@@ -1088,6 +1114,68 @@ class MultiUserChannelMatrix:  # pylint: disable=R0902
         channel = self.H
         return channel[k, l]
 
+    def get_all_Hkl(self) -> Optional[np.ndarray]:
+        """
+        Get the channel matrices between all transmitters and all receivers
+        stacked as a single 4D numpy array.
+
+        This is only possible when all users have the same number of
+        receive antennas and the same number of transmit antennas. The
+        returned array has a shape `K x K x Nr x Nt` and the element
+        `[k, l]` corresponds to the channel from transmitter `l` to
+        receiver `k` (the same matrix returned by `get_Hkl(k, l)`). This
+        allows computations involving the channels of all users to be
+        performed with a single vectorized numpy operation instead of a
+        Python loop over the users.
+
+        Returns
+        -------
+        np.ndarray | None
+            The channel of all users as a 4D numpy array, or None if the
+            users don't have the same number of antennas.
+
+        See also
+        --------
+        get_Hkl
+
+        Examples
+        --------
+        >>> multiH = MultiUserChannelMatrix()
+        >>> H = np.reshape(np.r_[0:16], [4,4])
+        >>> Nt = np.array([2, 2])
+        >>> Nr = np.array([2, 2])
+        >>> multiH.init_from_channel_matrix(H, Nr, Nt, 2)
+        >>> H_all_kl = multiH.get_all_Hkl()
+        >>> H_all_kl.shape
+        (2, 2, 2, 2)
+        >>> print(H_all_kl[1, 0])
+        [[ 8  9]
+         [12 13]]
+        >>> multiH.randomize(np.array([2, 3]), 2, 2)
+        >>> print(multiH.get_all_Hkl())
+        None
+        """
+        if self._H_all_kl is None:
+            K = self.K
+            Nr = self.Nr
+            Nt = self.Nt
+            if K == 0 or np.any(Nr != Nr[0]) or np.any(Nt != Nt[0]):
+                return None
+
+            # Note that we use K, Nr and Nt from the properties (and not
+            # the internal variables) and we only take the first columns
+            # of big_H. That way this also works for the subclasses that
+            # include external interference sources.
+            Nr0 = int(Nr[0])
+            Nt0 = int(Nt[0])
+            big_H = self.big_H[:K * Nr0, :K * Nt0]
+            self._H_all_kl = np.ascontiguousarray(
+                big_H.reshape(K, Nr0, K, Nt0).transpose(0, 2, 1, 3))
+            # Disallow modifications so that it stays in sync with big_H
+            self._H_all_kl.setflags(write=False)
+
+        return self._H_all_kl
+
     def get_Hk(self, k: int) -> np.ndarray:
         """
         Get the channel from all transmitters to receiver `k`.
@@ -1126,9 +1214,7 @@ class MultiUserChannelMatrix:  # pylint: disable=R0902
         [[ 8  9 10 11]
          [12 13 14 15]]
         """
-        receive_channels = single_matrix_to_matrix_of_matrices(
-            self.big_H, self.Nr)
-        return receive_channels[k]
+        return self.big_H[self._cumNr[k]:self._cumNr[k + 1]]
 
     def set_post_filter(self, filters: np.ndarray) -> None:
         """
@@ -1254,7 +1340,7 @@ class MultiUserChannelMatrix:  # pylint: disable=R0902
         concatenated_output = self.corrupt_concatenated_data(concatenated_data)
 
         output = np.zeros(self.K, dtype=np.ndarray)
-        cumNr = np.hstack([0, np.cumsum(self._Nr)])
+        cumNr = self._cumNr
 
         for k in np.arange(self.K):
             output[k] = concatenated_output[cumNr[k]:cumNr[k + 1], :]
@@ -1295,6 +1381,7 @@ class MultiUserChannelMatrix:  # pylint: disable=R0902
         # called.
         self._big_H_with_pathloss = None
         self._H_with_pathloss = None
+        self._H_all_kl = None
 
         if pathloss_matrix is None:
             self._pathloss_big_matrix = None
@@ -1333,7 +1420,10 @@ class MultiUserChannelMatrix:  # pylint: disable=R0902
         """
         # $$\mtQ k = \sum_{j=1, j \neq k}^{K} \frac{P_j}{Ns_j} \mtH_{kj} \mtF_j \mtF_j^H \mtH_{kj}^H$$
         interfering_users = set(range(self.K)) - {k}
-        Qk = np.zeros([self.Nr[k], self.Nr[k]], dtype=complex)
+        # Keep the precision of the channel and of the precoders (e.g.
+        # complex64) instead of always upcasting to complex128
+        Qk = np.zeros([self.Nr[k], self.Nr[k]],
+                      dtype=np.result_type(self.big_H, *F_all_users))
 
         for l in interfering_users:
             Hkl_F = np.dot(self.get_Hkl(k, l), F_all_users[l])
@@ -1381,6 +1471,88 @@ class MultiUserChannelMatrix:  # pylint: disable=R0902
 
         return Qk
 
+    def _calc_Q_all_k_impl(self, F_all_users: np.ndarray) -> np.ndarray:
+        """
+        Calculates the interference covariance matrix (without any noise) at
+        all receivers at once.
+
+        See the documentation of the calc_Q_all_k method.
+
+        Parameters
+        ----------
+        F_all_users : np.ndarray
+            The precoder of all users (already taking into account the
+            transmit power). This should be a 1D numpy array of 2D numpy
+            arrays, all of them with the same shape.
+
+        Returns
+        -------
+        np.ndarray
+        """
+        H_all_kl = self.get_all_Hkl()
+        if H_all_kl is None:
+            raise ValueError("All users must have the same number of receive"
+                             " and transmit antennas.")
+        K = self.K
+
+        # Product between the channel from each transmitter `l` to each
+        # receiver `k` and the precoder of transmitter `l`. This is a 4D
+        # array with dimension K x K x Nr x Ns.
+        Hkl_F = np.matmul(H_all_kl, np.stack(list(F_all_users))[np.newaxis])
+        # Remove the desired signal (l == k) contribution so that only the
+        # interfering users remain in the sum below
+        Hkl_F[np.arange(K), np.arange(K)] = 0.0
+
+        # $$\mtQ k = \sum_{l} \mtH_{kl} \mtF_l \mtF_l^H \mtH_{kl}^H$$
+        # This is equal to $\mtA_k \mtA_k^H$, where $\mtA_k$ is the
+        # horizontal concatenation of $\mtH_{kl} \mtF_l$ for all `l`
+        Nr, Ns = Hkl_F.shape[2:]
+        A_all_k = Hkl_F.transpose(0, 2, 1, 3).reshape(K, Nr, K * Ns)
+        return batched_herk(A_all_k)
+
+    def calc_Q_all_k(self, F_all_users: np.ndarray) -> np.ndarray:
+        """
+        Calculates the interference plus noise covariance matrix at all
+        receivers.
+
+        This is equivalent to calling :meth:`calc_Q` for each receiver,
+        but all of them are computed with vectorized numpy
+        operations. This is only possible when all users have the same
+        number of antennas and the same number of streams.
+
+        Parameters
+        ----------
+        F_all_users : np.ndarray
+            The precoder of all users (already taking into account the
+            transmit power). This should be a 1D numpy array of 2D numpy
+            arrays, all of them with the same shape.
+
+        Returns
+        -------
+        Q_all_k : np.ndarray
+            The interference covariance matrix of all receivers (a 3D numpy
+            complex array), where `Q_all_k[k]` is the covariance matrix at
+            receiver :math:`k`.
+
+        Raises
+        ------
+        ValueError
+            If the users don't have the same number of antennas or
+            streams.
+
+        See also
+        --------
+        calc_Q
+        """
+        Q_all_k = self._calc_Q_all_k_impl(F_all_users)
+
+        if self.noise_var is not None:
+            # If self.noise_var is not None we add the covariance matrix of
+            # the noise.
+            Q_all_k += np.eye(self.Nr[0]) * self.noise_var
+
+        return Q_all_k
+
     # noinspection PyPep8
     def _calc_JP_Q_impl(self, k: int, F_all_users: np.ndarray) -> np.ndarray:
         """
@@ -1505,8 +1677,8 @@ class MultiUserChannelMatrix:  # pylint: disable=R0902
             Vj = F_all_users[j]
             Vj_H = Vj.conjugate().transpose()
 
-            first_part = first_part + np.dot(Hkj,
-                                             np.dot(np.dot(Vj, Vj_H), Hkj_H))
+            first_part = first_part + np.linalg.multi_dot(
+                [Hkj, Vj, Vj_H, Hkj_H])
         first_part = first_part + Rek
 
         return first_part
@@ -1544,7 +1716,7 @@ class MultiUserChannelMatrix:  # pylint: disable=R0902
 
         Vkl = Fk[:, l:l + 1]
         Vkl_H = Vkl.transpose().conjugate()
-        second_part = np.dot(Hkk, np.dot(np.dot(Vkl, Vkl_H), Hkk_H))
+        second_part = np.linalg.multi_dot([Hkk, Vkl, Vkl_H, Hkk_H])
 
         return second_part
 
@@ -1651,8 +1823,8 @@ class MultiUserChannelMatrix:  # pylint: disable=R0902
             Vj = F_all_users[j]
             Vj_H = Vj.conjugate().transpose()
 
-            first_part = first_part + np.dot(Hk, np.dot(
-                np.dot(Vj, Vj_H), HK_H))
+            first_part = first_part + np.linalg.multi_dot(
+                [Hk, Vj, Vj_H, HK_H])
         first_part += Rek
 
         return first_part
@@ -1721,7 +1893,7 @@ class MultiUserChannelMatrix:  # pylint: disable=R0902
 
         Vkl = Fk[:, l:l + 1]
         Vkl_H = Vkl.transpose().conjugate()
-        second_part = np.dot(Hk, np.dot(np.dot(Vkl, Vkl_H), Hk_H))
+        second_part = np.linalg.multi_dot([Hk, Vkl, Vkl_H, Hk_H])
 
         return second_part
 
@@ -2231,9 +2403,7 @@ class MultiUserChannelMatrixExtInt(  # pylint: disable=R0904
         [[10 11 12 13]
          [15 16 17 18]]
         """
-        receive_channels = single_matrix_to_matrix_of_matrices(
-            self.big_H[:, :np.sum(self.Nt)], self.Nr)
-        return receive_channels[k]
+        return self.big_H[self._cumNr[k]:self._cumNr[k + 1], :np.sum(self.Nt)]
 
     # This is exactly the same as the
     # get_Hk_without_ext_int method from the
@@ -2377,8 +2547,12 @@ class MultiUserChannelMatrixExtInt(  # pylint: disable=R0904
             self, channel_matrix, full_Nr, full_Nt, full_K)
 
     def randomize(  # type: ignore
-            self, Nr: IntOrIntArrayUnion, Nt: IntOrIntArrayUnion, K: int,
-            NtE: Iterable[int]) -> None:
+            self,
+            Nr: IntOrIntArrayUnion,
+            Nt: IntOrIntArrayUnion,
+            K: int,
+            NtE: Iterable[int],
+            dtype: Any = complex) -> None:
         """
         Generates a random channel matrix for all users as well as for the
         external interference source(s).
@@ -2397,6 +2571,9 @@ class MultiUserChannelMatrixExtInt(  # pylint: disable=R0904
             Number of transmit antennas of the external interference
             source(s). If NtE is an iterable, the number of external
             interference sources will be the len(NtE).
+        dtype : np.dtype, optional
+            The complex dtype of the channel. The default is `complex`
+            (complex128).
         """
         if isinstance(Nr, int):
             Nr = np.ones(K, dtype=int) * Nr
@@ -2410,7 +2587,8 @@ class MultiUserChannelMatrixExtInt(  # pylint: disable=R0904
         self._extIntK = extIntK
         self._extIntNt = extIntNt
 
-        MultiUserChannelMatrix.randomize(self, full_Nr, full_Nt, full_K)
+        MultiUserChannelMatrix.randomize(self, full_Nr, full_Nt, full_K,
+                                         dtype)
 
     def set_pathloss(self,
                      pathloss_matrix: Optional[np.ndarray] = None,
@@ -2447,6 +2625,11 @@ class MultiUserChannelMatrixExtInt(  # pylint: disable=R0904
         # receiver.
         self._pathloss_matrix = pathloss_matrix
 
+        # Reset the cached channels that depend on the path loss. They will
+        # be correctly set the next time they are required.
+        self._big_H_with_pathloss = None
+        self._H_all_kl = None
+
         if pathloss_matrix is None:
             self._pathloss_matrix = None
             self._pathloss_big_matrix = None
@@ -2485,7 +2668,7 @@ class MultiUserChannelMatrixExtInt(  # pylint: disable=R0904
         """
         # $$\mtR_e = \sum_{j=1}^{Ke} P_{e_j} \mtH_{k{e_j}} \mtH_{k{e_j}}^H$$
         R_all_k = np.empty(self.Nr.size, dtype=np.ndarray)
-        cum_Nr = np.hstack([0, np.cumsum(self.Nr)])
+        cum_Nr = self._cumNr
 
         for ii in range(self.Nr.size):
             extH = self.big_H[cum_Nr[ii]:cum_Nr[ii + 1], np.sum(self.Nt):]
@@ -2565,6 +2748,36 @@ class MultiUserChannelMatrixExtInt(  # pylint: disable=R0904
 
         return Qk
 
+    def calc_Q_all_k(self,
+                     F_all_users: np.ndarray,
+                     pe: float = 1.0) -> np.ndarray:
+        """
+        Calculates the interference covariance matrix at all receivers.
+
+        This is equivalent to calling :meth:`calc_Q` for each receiver,
+        but all of them are computed with vectorized numpy
+        operations. This is only possible when all users have the same
+        number of antennas and the same number of streams.
+
+        Parameters
+        ----------
+        F_all_users : list[np.ndarray] | np.ndarray
+            The precoder of all users (already taking into account the
+            transmit power). This should be either a list of numpy
+            2D arrays or a 1D numpy array of 2D numpy arrays.
+        pe : float
+            The power of the external interference source(s).
+
+        Returns
+        -------
+        Q_all_k : np.ndarray
+            The interference covariance matrix of all receivers (a 3D numpy
+            complex array).
+        """
+        Rek_all_k = self.calc_cov_matrix_extint_plus_noise(pe)
+        return self._calc_Q_all_k_impl(F_all_users) + np.stack(
+            list(Rek_all_k))
+
     # noinspection PyPep8
     def _calc_JP_Q(self, k: int, F_all_users: np.ndarray) -> np.ndarray:
         """
@@ -11,18 +11,22 @@ the noise variance.
 """
 
 import itertools
+import os
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from copy import copy
 from itertools import product
-from typing import (Any, List, Optional, Sequence, Tuple, Type, TypeVar, Union,
-                    cast)
+from typing import (Any, Callable, Dict, List, Optional, Sequence, Tuple,
+                    Type, TypeVar, Union, cast)
 
 import numpy as np
 from scipy import optimize
+from scipy.sparse.linalg import eigsh
 
 from ..channels import multiuser as muchannels
+from ..util import _ia_kernels
 from ..util.misc import (get_principal_component_matrix,
-                         least_right_singular_vectors, leig, peig,
+                         least_right_singular_vectors, leig,
                          update_inv_sum_diag)
 from .iabase import IASolverBaseClass
 
@@ -35,6 +39,109 @@ __all__ = [
 FloatOrFloatSequence = TypeVar("FloatOrFloatSequence", float, Sequence[float])
 IntOrIntSequence = TypeVar("IntOrIntSequence", int, Sequence[int])
 
+# Matrices with dimension larger than this use a truncated (Lanczos)
+# eigen-solver when only a few eigenvectors are required. For small
+# matrices a full eigen-decomposition is faster.
+_TRUNCATED_EIGH_MIN_DIM = 16
+
+# The per user computations (when the users have different dimensions) are
+# performed in a thread pool when there are at least this many users. The
+# work is done mostly inside numpy/LAPACK calls, which release the GIL.
+# For fewer users the overhead of the thread pool is not worth it.
+_THREAD_POOL_MIN_USERS = 8
+
+
+def _use_truncated_eigh(N: int, n: int) -> bool:
+    """
+    Check if a truncated eigen-solver should be used to get `n`
+    eigenvectors of a `N x N` Hermitian matrix.
+
+    Parameters
+    ----------
+    N : int
+        Dimension of the (square) matrix.
+    n : int
+        Number of desired eigenvectors.
+
+    Returns
+    -------
+    bool
+        True if the truncated eigen-solver should be used.
+    """
+    return bool(N > _TRUNCATED_EIGH_MIN_DIM and 0 < n < N // 3)
+
+
+def _truncated_eigh(A: np.ndarray, n: int, largest: bool) -> np.ndarray:
+    """
+    Get the `n` dominant (or least dominant) eigenvectors of the Hermitian
+    matrix `A` with a truncated Lanczos eigen-solver.
+
+    Parameters
+    ----------
+    A : np.ndarray
+        A Hermitian matrix (2D numpy array).
+    n : int
+        Number of desired eigenvectors.
+    largest : bool
+        If True the eigenvectors corresponding to the `n` largest
+        eigenvalues are returned, otherwise the ones corresponding to the
+        `n` smallest eigenvalues.
+
+    Returns
+    -------
+    np.ndarray
+        A 2D numpy array with the desired eigenvectors as columns. They
+        are sorted in the same order as returned by `peig` (if `largest`
+        is True) or by `leig` (if `largest` is False).
+    """
+    # Note that eigsh returns the eigenvalues in ascending order
+    if largest:
+        _, V = eigsh(A, k=n, which='LA')
+        return V[:, ::-1]
+    _, V = eigsh(A, k=n, which='SA')
+    return V
+
+
+def _subset_eigh(A: np.ndarray, n: int, largest: bool) -> np.ndarray:
+    """
+    Get the `n` dominant (or least dominant) eigenvectors of the Hermitian
+    matrix `A`.
+
+    A Hermitian solver is used, which is cheaper than the full
+    (non-symmetric) eigen-decomposition followed by sorting done in
+    `peig` and `leig`. Note that restricting the eigenpairs computed by
+    LAPACK (`scipy.linalg.eigh` with `subset_by_index`) is slower than a
+    full `np.linalg.eigh` for the sizes where this function is used,
+    since for large matrices and few eigenvectors `_truncated_eigh` is
+    used instead.
+
+    Parameters
+    ----------
+    A : np.ndarray
+        A Hermitian matrix (2D numpy array).
+    n : int
+        Number of desired eigenvectors.
+    largest : bool
+        If True the eigenvectors corresponding to the `n` largest
+        eigenvalues are returned, otherwise the ones corresponding to the
+        `n` smallest eigenvalues.
+
+    Returns
+    -------
+    np.ndarray
+        A 2D numpy array with the desired eigenvectors as columns. They
+        are sorted in the same order as returned by `peig` (if `largest`
+        is True) or by `leig` (if `largest` is False).
+    """
+    N = A.shape[0]
+    if n == 0:
+        return np.empty((N, 0), dtype=A.dtype)
+    # Note that eigh returns the eigenvalues in ascending order
+    _, V = np.linalg.eigh(A)
+    if largest:
+        return V[:, :-n - 1:-1]
+    return V[:, :n]
+
 
 # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 # xxxxxxxxxxxxxxx ClosedFormIASolver class xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
@@ -919,6 +1026,14 @@ class AlternatingMinIASolver(IterativeIASolverBaseClass):
         self._C: List[np.ndarray] = [
         ]  # Basis of the interference subspace for each user
 
+        # Work buffers reused across iterations by the stacked (uniform
+        # dimensions) implementation of _updateF. See _get_scratch.
+        self._scratch: Dict[str, np.ndarray] = {}
+
+        # Thread pool used by _map_users. It is created lazily and reused
+        # across iterations. See _map_users and _shutdown_executor.
+        self._executor: Optional[ThreadPoolExecutor] = None
+
     # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 
     # Overwrite the set property for 'initialize_with' to remove the
@@ -945,21 +1060,28 @@ class AlternatingMinIASolver(IterativeIASolverBaseClass):
             The Cost of the algorithm for the current iteration of the
             precoder. This is a real non-negative number.
         """
-        Cost = 0
-        # This will get all combinations of (k,l) without repetition. This
-        # is equivalent to two nested for loops with an if statement to
-        # only execute the code only when `k` is different of `l`.
-        all_kl_indexes = itertools.permutations(range(self.K), 2)
-
-        for kl in all_kl_indexes:
-            (k, l) = kl
-            Hkl_Fl = np.dot(self._get_channel(k, l), self.full_F[l])
-            Cost += np.linalg.norm(
-                Hkl_Fl -
-                np.dot(np.dot(self._C[k], self._C[k].transpose().conjugate()),
-                       Hkl_Fl), 'fro')**2
-
-        return Cost
+        if self._has_uniform_dimensions():
+            H_all_kl = self._multiUserChannel.get_all_Hkl()
+            F_all_l = np.stack(list(self.full_F))
+            C_all_k = self._C
+        else:
+            # Zero pad the matrices of all users to the same dimensions,
+            # which does not change the cost
+            K = self.K
+            H_all_kl = _ia_kernels.pack_stack([
+                self._get_channel(k, l) for k, l in product(range(K), range(K))
+            ])
+            H_all_kl = H_all_kl.reshape(K, K, *H_all_kl.shape[1:])
+            F_all_l = _ia_kernels.pack_stack(self.full_F)
+            C_all_k = _ia_kernels.pack_stack(self._C)
+
+        # Since the columns of C_k are orthonormal the cost of all (k,l)
+        # pairs can be computed at once without forming the projection
+        # matrices (see `_ia_kernels.compute_cost`).
+        cost = _ia_kernels.compute_cost(H_all_kl, F_all_l, C_all_k)
+        # Avoid tiny negative values due to numerical errors when the
+        # interference is perfectly aligned
+        return max(cost, 0.0)
 
     def _before_initialize_W_func(self) -> None:
         """
@@ -968,6 +1090,96 @@ class AlternatingMinIASolver(IterativeIASolverBaseClass):
         """
         self._updateC()
 
+    def _has_uniform_dimensions(self) -> bool:
+        """
+        Check if all users have the same number of receive antennas,
+        transmit antennas and streams.
+
+        When this is the case the matrices of all users can be stacked
+        into a single numpy array and the computations can be performed
+        for all users at once.
+
+        Returns
+        -------
+        bool
+            True if all users have the same dimensions, False otherwise.
+        """
+        return (self._multiUserChannel.get_all_Hkl() is not None
+                and bool(np.all(self.Ns == self.Ns[0])))
+
+    def _get_scratch(self, name: str, shape: Tuple[int, ...],
+                     dtype: Any) -> np.ndarray:
+        """
+        Get a work buffer that is reused across iterations.
+
+        A new buffer is only allocated in the first call, or when the
+        requested shape or dtype changed (e.g. after the channel was
+        randomized again with other dimensions). The content of the
+        returned buffer is not initialized.
+
+        Parameters
+        ----------
+        name : str
+            The name identifying the buffer.
+        shape : tuple[int]
+            The shape of the buffer.
+        dtype : np.dtype
+            The dtype of the buffer.
+
+        Returns
+        -------
+        np.ndarray
+            The work buffer.
+        """
+        buffer = self._scratch.get(name)
+        if (buffer is None or buffer.shape != shape
+                or buffer.dtype != dtype):
+            buffer = np.empty(shape, dtype=dtype)
+            self._scratch[name] = buffer
+        return buffer
+
+    def _map_users(self,
+                   func: Callable[[int], np.ndarray]) -> List[np.ndarray]:
+        """
+        Call `func(k)` for each user `k`.
+
+        The calls are performed in a thread pool if there are at least
+        `_THREAD_POOL_MIN_USERS` users and more than one CPU is available.
+        Otherwise they are performed sequentially.
+
+        The thread pool is created in the first call and reused in the
+        next ones (it is shut down when the solve method finishes and its
+        threads exit when the solver is garbage collected), since
+        creating a new pool at each iteration would be more expensive than
+        the per user computations themselves.
+
+        Parameters
+        ----------
+        func : callable
+            A function receiving the user index and returning a numpy
+            array. It must not modify any shared state.
+
+        Returns
+        -------
+        list[np.ndarray]
+            The values returned by `func` for each user, in order.
+        """
+        num_workers = min(self.K, os.cpu_count() or 1)
+        if self.K < _THREAD_POOL_MIN_USERS or num_workers < 2:
+            return [func(k) for k in range(self.K)]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=num_workers)
+        return list(self._executor.map(func, range(self.K)))
+
+    def _shutdown_executor(self) -> None:
+        """
+        Shut down the thread pool used by :meth:`_map_users` (if it was
+        created).
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
     def _step(self) -> None:
         """
         Performs one iteration of the algorithm.
@@ -1006,6 +1218,45 @@ class AlternatingMinIASolver(IterativeIASolverBaseClass):
         self._updateW()  # Depend on the value of C
         IterativeIASolverBaseClass._solve_finalize(self)
 
+    def solve(self,
+              Ns: IntOrIntSequence,
+              P: Optional[FloatOrFloatSequence] = None) -> int:
+        """
+        Find the IA solution by performing the :meth:`_step` method several times.
+
+        See :meth:`IterativeIASolverBaseClass.solve`. The thread pool used
+        by :meth:`_map_users` is shut down when the solve method finishes,
+        even if an exception is raised.
+
+        Parameters
+        ----------
+        Ns : int | np.ndarray
+            Number of streams of each user.
+        P : np.ndarray | List[float] | float, optional
+            Power of each user. If not provided, a value of 1 will be used
+            for each user.
+
+        Returns
+        -------
+        Number of iterations that the iterative interference alignment
+        algorithm run.
+        """
+        try:
+            return IterativeIASolverBaseClass.solve(self, Ns, P)
+        finally:
+            self._shutdown_executor()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Get the state of the object for pickling (and copying).
+
+        The thread pool used by :meth:`_map_users` is not included, since
+        it can't be pickled. It is created again when needed.
+        """
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        return state
+
     # noinspection PyPep8
     def _updateC(self) -> None:
         """Update the value of Ck for all K users.
@@ -1028,16 +1279,40 @@ class AlternatingMinIASolver(IterativeIASolverBaseClass):
         # xxxxxxxxxx New Implementation using calc_Q xxxxxxxxxxxxxxxxxxxxxx
         Ni = self.Nr - self.Ns  # Ni: Dimension of the interference subspace
 
-        self._C = np.empty(self.K, dtype=np.ndarray)
-
-        for k in np.arange(self.K):
+        if self._has_uniform_dimensions():
+            # All users have the same dimensions and we can compute the
+            # interference covariance matrix of all users at once and get
+            # their eigenvectors with a single (batched) call to eigh.
+            Q_all_k = np.ascontiguousarray(self.calc_Q_all_k())
+            if _use_truncated_eigh(self.Nr[0], Ni[0]):
+                self._C = np.stack(
+                    self._map_users(lambda k: _truncated_eigh(
+                        Q_all_k[k], Ni[0], largest=True)))
+            else:
+                # Note that eigh returns the eigenvalues in ascending order
+                _, V = np.linalg.eigh(Q_all_k)
+                # C[k] will receive the Ni most dominant eigenvectors of
+                # Q[k]
+                self._C = np.ascontiguousarray(V[:, :, ::-1][:, :, :Ni[0]])
+            return
+
+        def calc_Ck(k: int) -> np.ndarray:
             # TODO: Implement and test with external interference
-            # # We are inside only of the first for loop
             # # Add the external interference contribution
-            # self._C[k] = self.calc_Q(k) + self.Rk[k]
+            # Qk = self.calc_Q(k) + self.Rk[k]
 
-            # C[k] will receive the Ni most dominant eigenvectors of C[k]
-            self._C[k] = peig(self.calc_Q(k), Ni[k])[0]
+            # C[k] will receive the Ni most dominant eigenvectors of Q[k]
+            if _use_truncated_eigh(self.Nr[k], Ni[k]):
+                return _truncated_eigh(self.calc_Q(k), Ni[k], largest=True)
+            return _subset_eigh(self.calc_Q(k), Ni[k], largest=True)
+
+        # The full_F property is calculated lazily. We access it here
+        # to compute it before calc_Ck is (possibly) called from
+        # several threads.
+        _ = self.full_F
+        self._C = np.empty(self.K, dtype=np.ndarray)
+        for k, Ck in enumerate(self._map_users(calc_Ck)):
+            self._C[k] = Ck
         # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 
     def _updateF(self) -> None:
@@ -1059,40 +1334,88 @@ class AlternatingMinIASolver(IterativeIASolverBaseClass):
         """
         # $\sum_{k \neq l} \mtH_{k,l}^H (\mtI - \mtC_k \mtC_k^H)\mtH_{k,l}$
 
-        # xxxxx Calculates the temporary variable Y[k] for all k xxxxxxxxxx
-        # Note that $\mtY[k] = (\mtI - \mtC_k \mtC_k^H)$
+        # Since the columns of $\mtC_k$ are orthonormal, each term is
+        # calculated as $\mtH_{k,l}^H \mtH_{k,l} - \mtX^H \mtX$, where
+        # $\mtX = \mtC_k^H \mtH_{k,l}$ is only Ni x Nt. This avoids forming
+        # the Nr x Nr projection matrices $(\mtI - \mtC_k \mtC_k^H)$.
 
         self._clear_precoder_filter()
 
         # The number of users is always 3 for the ClosedFormIASolver class
         self._F = np.zeros(self.K, dtype=np.ndarray)
 
-        def calc_Y(Nr: int, C: np.ndarray) -> np.ndarray:
-            return (np.eye(Nr, dtype=complex) -
-                    np.dot(C,
-                           C.conjugate().transpose()))
-
-        Y = list(map(calc_Y, self.Nr, self._C))
-
-        newF = np.zeros(self.K, dtype=np.ndarray)
-        # This will get all combinations of (l,k) without repetition. This
-        # is equivalent to two nested for loops with an if statement to
-        # only execute the code only when `l` is different of `k`
-        all_lk_indexes = itertools.permutations(range(self.K), 2)
-
-        # This code will store in newF[l] the equivalent of
-        # $\sum_{k \neq l} \mtH_{k,l}^H (\mtI - \mtC_k \mtC_k^H)H_{k,l}$
-        for lk in all_lk_indexes:
-            (l, k) = lk
-            lH = self._get_channel(k, l)
-            newF[l] = newF[l] + np.dot(
-                np.dot(lH.conjugate().transpose(), Y[k]), lH)
-
-        # Every element in newF is a matrix. We want to replace each
-        # element by the least dominant eigenvectors of that element.
-        for k in range(self.K):
-            self._F[k] = leig(newF[k], self.Ns[k])[0]
-            self._F[k] /= np.linalg.norm(self._F[k], 'fro')
+        if self._has_uniform_dimensions():
+            # All users have the same dimensions and the C matrices were
+            # stacked into a single 3D array by the _updateC method. The
+            # sum for all users is then calculated at once and the
+            # eigenvectors are obtained with a single (batched) call to
+            # eigh.
+            H_all_kl = self._multiUserChannel.get_all_Hkl()
+            C = self._C
+
+            K, _, _, Nt = H_all_kl.shape
+            Ni = C.shape[2]
+            dtype = np.result_type(H_all_kl, C)
+
+            # The intermediate results are stored in work buffers that are
+            # reused in the next iterations
+            # X[k, l] corresponds to C_k^H H_{k,l}
+            X = np.matmul(C.conj().transpose(0, 2, 1)[:, np.newaxis],
+                          H_all_kl,
+                          out=self._get_scratch('X', (K, K, Ni, Nt), dtype))
+            # terms[k, l] corresponds to H_{k,l}^H (I - C_k C_k^H) H_{k,l}
+            terms = np.matmul(H_all_kl.conj().transpose(0, 1, 3, 2),
+                              H_all_kl,
+                              out=self._get_scratch('terms', (K, K, Nt, Nt),
+                                                    dtype))
+            terms -= np.matmul(X.conj().transpose(0, 1, 3, 2),
+                               X,
+                               out=self._get_scratch('X_H_X',
+                                                     (K, K, Nt, Nt), dtype))
+            # Remove the k == l terms from the sum
+            terms[np.arange(K), np.arange(K)] = 0.0
+            newF_all_l = terms.sum(axis=0,
+                                   out=self._get_scratch(
+                                       'newF', (K, Nt, Nt), dtype))
+
+            if _use_truncated_eigh(self.Nt[0], self.Ns[0]):
+                F_all_l = np.stack(
+                    self._map_users(lambda l: _truncated_eigh(
+                        newF_all_l[l], self.Ns[0], largest=False)))
+            else:
+                # Note that eigh returns the eigenvalues in ascending order
+                _, V = np.linalg.eigh(newF_all_l)
+                F_all_l = V[:, :, :self.Ns[0]]
+            F_all_l = F_all_l / np.linalg.norm(
+                F_all_l, axis=(1, 2))[:, np.newaxis, np.newaxis]
+            for l in range(self.K):
+                self._F[l] = F_all_l[l]
+            return
+
+        def calc_Fl(l: int) -> np.ndarray:
+            # This will store in newFl the equivalent of
+            # $\sum_{k \neq l} \mtH_{k,l}^H (\mtI - \mtC_k \mtC_k^H)H_{k,l}$
+            newFl = 0.0
+            for k in range(self.K):
+                if k == l:
+                    continue
+                lH = self._get_channel(k, l)
+                X = np.dot(self._C[k].conj().T, lH)
+                newFl = newFl + (np.dot(lH.conj().T, lH) -
+                                 np.dot(X.conj().T, X))
+
+            # We want the least dominant eigenvectors of newFl
+            if _use_truncated_eigh(self.Nt[l], self.Ns[l]):
+                Fl = _truncated_eigh(newFl, self.Ns[l], largest=False)
+            else:
+                # newFl is Hermitian (up to rounding errors). Using a
+                # Hermitian solver guarantees orthonormal eigenvectors even
+                # when newFl has a repeated (null) eigenvalue.
+                Fl = _subset_eigh(newFl, self.Ns[l], largest=False)
+            return Fl / np.linalg.norm(Fl, 'fro')
+
+        for l, Fl in enumerate(self._map_users(calc_Fl)):
+            self._F[l] = Fl
 
     def _updateW(self) -> None:
         """
@@ -1115,14 +1438,36 @@ class AlternatingMinIASolver(IterativeIASolverBaseClass):
         # Note that the formula for the receive filter in the "Interference
         # Alignment via Alternating Minimization" paper actually calculates
         # W_H instead of W.
+        #
+        # We only want the first Ns[k] lines of the inverse of tildeHi. If
+        # X is formed by these lines, then X tildeHi = [I 0] and thus X^T
+        # can be obtained with np.linalg.solve without computing the full
+        # inverse.
         newW_H = np.zeros(self.K, dtype=np.ndarray)
         assert (self._F is not None)
+
+        if self._has_uniform_dimensions():
+            K = self.K
+            Nr = self.Nr[0]
+            Ns = self.Ns[0]
+            H_all_kl = self._multiUserChannel.get_all_Hkl()
+            Hkk_Fk = np.matmul(H_all_kl[np.arange(K), np.arange(K)],
+                               np.stack(list(self._F)))
+            tildeH = np.concatenate([Hkk_Fk, self._C], axis=2)
+            E = np.broadcast_to(
+                np.eye(Nr, dtype=tildeH.dtype)[:, 0:Ns], (K, Nr, Ns))
+            W_H = np.linalg.solve(tildeH.transpose(0, 2, 1),
+                                  E).transpose(0, 2, 1)
+            for k in range(K):
+                newW_H[k] = W_H[k]
+            self._W_H = newW_H
+            return
+
         for k in np.arange(self.K):
             tildeHi = np.hstack(
                 [np.dot(self._get_channel(k, k), self._F[k]), self._C[k]])
-            newW_H[k] = np.linalg.inv(tildeHi)
-            # We only want the first Ns[k] lines
-            newW_H[k] = newW_H[k][0:self.Ns[k]]
+            E = np.eye(self.Nr[k], dtype=tildeHi.dtype)[:, 0:self.Ns[k]]
+            newW_H[k] = np.linalg.solve(tildeHi.T, E).T
         self._W_H = newW_H
 
 
@@ -1166,7 +1511,7 @@ class MinLeakageIASolver(IterativeIASolverBaseClass):
         for k in range(self.K):
             Qk = self.calc_Q(k)
             Wk = self._W[k]
-            aux = np.dot(np.dot(Wk.transpose().conjugate(), Qk), Wk)
+            aux = np.linalg.multi_dot([Wk.transpose().conjugate(), Qk, Wk])
             cost = cost + np.trace(np.abs(aux))
         return cost
 
@@ -1299,8 +1644,8 @@ class MaxSinrIASolver(IterativeIASolverBaseClass):
             assert (isinstance(P, np.ndarray))
             assert (isinstance(self._Ns, np.ndarray))
             Vj_H = Vj.conjugate().transpose()
-            first_part += (float(P[j]) / self._Ns[j]) * np.dot(
-                Hkj, np.dot(np.dot(Vj, Vj_H), Hkj_H))
+            first_part += (float(P[j]) / self._Ns[j]) * np.linalg.multi_dot(
+                [Hkj, Vj, Vj_H, Hkj_H])
 
         return first_part
 
@@ -1336,7 +1681,7 @@ class MaxSinrIASolver(IterativeIASolverBaseClass):
         assert (self._W is not None)
         Vkl = self._W[k][:, l:l + 1]
         Vkl_H = Vkl.transpose().conjugate()
-        second_part = np.dot(Hkk, np.dot(np.dot(Vkl, Vkl_H), Hkk_H))
+        second_part = np.linalg.multi_dot([Hkk, Vkl, Vkl_H, Hkk_H])
         assert (isinstance(P, np.ndarray))
         assert (isinstance(self._Ns, np.ndarray))
         return second_part * (float(P[k]) / self._Ns[k])
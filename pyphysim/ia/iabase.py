@@ -196,7 +196,12 @@ class IASolverBaseClass:  # pylint: disable=R0902
             arrays).
         """
         if self._full_F is None:
-            self._full_F = self._F * np.sqrt(self.P)
+            # Multiply each precoder by a Python float so that the dtype of
+            # the precoders (complex64 or complex128) is preserved
+            sqrt_P = np.sqrt(self.P)
+            self._full_F = np.empty(len(self._F), dtype=np.ndarray)
+            for k, Fk in enumerate(self._F):
+                self._full_F[k] = Fk * float(sqrt_P[k])
         return self._full_F
 
     # noinspection PyUnresolvedReferences
@@ -535,9 +540,14 @@ class IASolverBaseClass:  # pylint: disable=R0902
         def normalized(A: np.ndarray) -> np.ndarray:
             return A / np.linalg.norm(A, 'fro')
 
+        # The precoders use the same precision as the channel (complex128
+        # unless the channel was generated with complex64)
+        dtype = np.result_type(self._multiUserChannel.big_H.dtype,
+                               np.complex64)
         self._F = np.zeros(self.K, dtype=np.ndarray)
         for k in range(self.K):
-            self._F[k] = normalized(randn_c_RS(self._rs, self.Nt[k], Ns[k]))
+            self._F[k] = normalized(
+                randn_c_RS(self._rs, self.Nt[k], Ns[k], dtype=dtype))
 
         # This will create a new array so that we can modify self._Ns
         # internally without changing the original Ns variable passed to
@@ -629,6 +639,26 @@ class IASolverBaseClass:  # pylint: disable=R0902
         Qk = self._multiUserChannel.calc_Q(k, self.full_F)
         return Qk
 
+    def calc_Q_all_k(self) -> np.ndarray:
+        """
+        Calculates the interference covariance matrix at all receivers.
+
+        This is the same as calling :meth:`calc_Q` for each receiver, but
+        it is only possible when all users have the same number of
+        antennas and streams.
+
+        Returns
+        -------
+        Q_all_k : np.ndarray
+            The interference covariance matrix of all receivers (a 3D numpy
+            array), where `Q_all_k[k]` corresponds to `calc_Q(k)`.
+
+        Notes
+        -----
+        This is impacted by the self.P attribute.
+        """
+        return self._multiUserChannel.calc_Q_all_k(self.full_F)
+
     # This method must be tested in a subclass of IASolverBaseClass, since
     # we need the receive filter and IASolverBaseClass does not know how to
     # calculate it
@@ -2,15 +2,14 @@
 """Module containing simulation parameter classes."""
 
 import copy
-import functools
 import itertools
-import operator
-from collections import OrderedDict
+import math
+import pickle
 from collections.abc import Iterable
 
 import numpy as np
 
-from ..util.serialize import JsonSerializable
+from ..util.serialize import JsonSerializable, get_object_state
 from .configobjvalidation import (integer_numpy_array_check,
                                   integer_scalar_or_integer_numpy_array_check,
                                   real_numpy_array_check,
@@ -27,11 +26,6 @@ try:
 except ImportError:  # pragma: no cover
     pass
 
-try:
-    import cPickle as pickle
-except ImportError as e:  # pragma: no cover
-    import pickle
-
 __all__ = ["combine_simulation_parameters", "SimulationParameters"]
 
 
@@ -147,6 +141,12 @@ class SimulationParameters(JsonSerializable):
     .SimulationResults : Class to store simulation results.
     .SimulationRunner : Base class to implement Monte Carlo simulations.
     """
+    # One SimulationParameters object is created for each combination of
+    # the unpacked parameters. Using __slots__ makes them smaller.
+    __slots__ = ('parameters', '_unpacked_parameters_set', '_unpack_index',
+                 '_original_sim_params', '_value_index_cache',
+                 '_unpacked_params_cache')
+
     def __init__(self):
         # Dictionary that will store the parameters. The key is the
         # parameter name and the value is the parameter value.
@@ -169,6 +169,52 @@ class SimulationParameters(JsonSerializable):
         self._unpack_index = -1
         self._original_sim_params = None
 
+        # Cache with the map from each value to its index for the
+        # parameters used in get_pack_indexes. For each parameter name we
+        # store a snapshot (tuple) of the parameter values (to check that
+        # they did not change) and the map. See _get_value_index_map.
+        self._value_index_cache = {}
+
+        # Cache with the combinations of the values of the unpacked
+        # parameters used by get_unpacked_params_list (when use_cache is
+        # True). It stores a snapshot of the values of the unpacked
+        # parameters (to check that they did not change) and the
+        # combinations. See _get_unpacked_combinations.
+        self._unpacked_params_cache = None
+
+    def __getstate__(self):
+        """
+        Get the state of the SimulationParameters object for pickling.
+
+        Returns
+        -------
+        dict
+            Dictionary with the value of each attribute, including the
+            ones added by subclasses.
+        """
+        state = get_object_state(self)
+        # The cached unpacked parameters are not pickled, since they can
+        # be easily created again
+        state.pop('_unpacked_params_cache', None)
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restore the state of a pickled SimulationParameters object.
+
+        Parameters
+        ----------
+        state : dict
+            Dictionary with the value of each attribute. This is also the
+            state of SimulationParameters objects pickled before __slots__
+            was used.
+        """
+        # Objects pickled before the caches were introduced don't have them
+        self._value_index_cache = {}
+        self._unpacked_params_cache = None
+        for name, value in state.items():
+            setattr(self, name, value)
+
     @property
     def unpack_index(self):
         """Get method for the unpack_index property.
@@ -209,7 +255,10 @@ class SimulationParameters(JsonSerializable):
         return fixed_params
 
     @staticmethod
-    def _create(params_dict, unpack_index=-1, original_sim_params=None):
+    def _create(params_dict,
+                unpack_index=-1,
+                original_sim_params=None,
+                copy_params_dict=True):
         """
         Creates a new SimulationParameters object.
 
@@ -231,6 +280,11 @@ class SimulationParameters(JsonSerializable):
             The original SimulationParameters object from which the
             SimulationParameters object that will be created by this method
             came from.
+        copy_params_dict : bool
+            If True (default), a (shallow) copy of `params_dict` is stored
+            in the created object. If False, `params_dict` itself is
+            stored, which should only be used when the caller owns
+            `params_dict`.
 
         Returns
         -------
@@ -238,7 +292,10 @@ class SimulationParameters(JsonSerializable):
             The corresponding SimulationParameters object.
         """
         sim_params = SimulationParameters()
-        sim_params.parameters = copy.deepcopy(params_dict)
+        if copy_params_dict:
+            sim_params.parameters = dict(params_dict)
+        else:
+            sim_params.parameters = params_dict
         if unpack_index < 0:
             unpack_index = -1
         # pylint: disable=W0212
@@ -267,9 +324,49 @@ class SimulationParameters(JsonSerializable):
         -------
         sim_params : SimulationParameters
             The corresponding SimulationParameters object.
+
+        Notes
+        -----
+        The dictionary is copied, but the parameter values are shared by
+        reference with `params_dict`. That is, changing a (mutable)
+        value in place, such as a numpy array, also changes it in the
+        created object. Use :meth:`create_deep` if the values must be
+        copied.
+
+        See also
+        --------
+        create_deep
         """
         return SimulationParameters._create(params_dict)
 
+    @staticmethod
+    def create_deep(params_dict):
+        """
+        Creates a new SimulationParameters object with a deep copy of the
+        parameters.
+
+        This is the same as :meth:`create`, but the parameter values are
+        also (deep) copied and thus not shared with `params_dict`.
+
+        Parameters
+        ----------
+        params_dict : dict
+            Dictionary containing the parameters. Each dictionary key
+            corresponds to a parameter's name, while the dictionary value
+            corresponds to the actual parameter value..
+
+        Returns
+        -------
+        sim_params : SimulationParameters
+            The corresponding SimulationParameters object.
+
+        See also
+        --------
+        create
+        """
+        return SimulationParameters._create(copy.deepcopy(params_dict),
+                                            copy_params_dict=False)
+
     def add(self, name, value):
         """Adds a new parameter to the SimulationParameters object.
 
@@ -284,6 +381,8 @@ class SimulationParameters(JsonSerializable):
             Value of the parameter.
         """
         self.parameters[name] = value
+        self._value_index_cache.pop(name, None)
+        self._unpacked_params_cache = None
 
     def remove(self, name):
         """
@@ -301,6 +400,8 @@ class SimulationParameters(JsonSerializable):
             If `name` is not in parameters.
         """
         del self.parameters[name]
+        self._value_index_cache.pop(name, None)
+        self._unpacked_params_cache = None
         if name in self._unpacked_parameters_set:
             self._unpacked_parameters_set.remove(name)
 
@@ -330,6 +431,8 @@ class SimulationParameters(JsonSerializable):
                     self._unpacked_parameters_set.add(name)
                 else:
                     self._unpacked_parameters_set.remove(name)
+                self._value_index_cache.pop(name, None)
+                self._unpacked_params_cache = None
             else:
                 raise ValueError("Parameter {0} is not iterable".format(name))
         else:
@@ -512,15 +615,9 @@ class SimulationParameters(JsonSerializable):
         if self._original_sim_params is not None:
             return self._original_sim_params.get_num_unpacked_variations()
 
-        if len(self._unpacked_parameters_set) == 0:
-            return 1
-
-        # Generator for the lengths of the parameters set to be
-        # unpacked
-        gen_values = (len(self.parameters[i])
-                      for i in self._unpacked_parameters_set)
-        # Just multiply all the lengths
-        return functools.reduce(operator.mul, gen_values)
+        # math.prod returns 1 when no parameter was marked to be unpacked
+        return math.prod(
+            len(self.parameters[i]) for i in self._unpacked_parameters_set)
 
     def get_pack_indexes(self, fixed_params_dict=None):
         """
@@ -590,49 +687,261 @@ class SimulationParameters(JsonSerializable):
         varying_param = list(self._unpacked_parameters_set -
                              set(fixed_params_dict.keys()))
 
-        # List to store the indexes (as strings) of the fixed parameters,
-        # as well as ":" for the varying parameter,
+        # List to store, for each parameter marked to be unpacked, the
+        # indexes of the desired values. For a fixed parameter this is
+        # only the index of its fixed value, while for the varying
+        # parameter this are all the indexes.
         param_indexes = []
+        # Get the lengths of the parameters marked to be unpacked
+        dimensions = []
         # Note that self.unpacked_parameters is a sorted list, which
         # guarantees a predictable order
         for i in self.unpacked_parameters:
+            num_values = len(self.parameters[i])
+            dimensions.append(num_values)
             if i in varying_param:
-                param_indexes.append(':')
+                param_indexes.append(np.arange(num_values))
             else:
-                fixed_param_value_index = list(self.parameters[i]).index(
-                    fixed_params_dict[i])
-                param_indexes.append(str(fixed_param_value_index))
+                param_indexes.append(
+                    [self._get_value_index(i, fixed_params_dict[i])])
 
         # xxxxx Get the indexes xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
-        # For this we create a auxiliary numpy array going from 0 to the
-        # number of unpack variations. Then we use param_indexes to build a
-        # string that we can evaluate using the auxiliary numpy array in
-        # order to get the linear indexes.
-
-        # Get the lengths of the parameters marked to be unpacked
-        dimensions = [
-            len(self.parameters[i]) for i in self.unpacked_parameters
-        ]
-        aux = np.arange(0, self.get_num_unpacked_variations())
-        aux.shape = dimensions
-        indexes = eval("aux" +
-                       "[{0}]".format(",".join(param_indexes))).flatten()
+        # The linear indexes are computed from the indexes of each
+        # parameter (in C order, which is the order of the combinations
+        # returned by get_unpacked_params_list) with np.ravel_multi_index
+        indexes = np.ravel_multi_index(np.ix_(*param_indexes),
+                                       dimensions).flatten()
         # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
         # if indexes.size == 1:
         #     indexes = indexes[0]
 
         return indexes
 
-    def get_unpacked_params_list(self):
+    def _get_value_index_map(self, name):
+        """
+        Get a dictionary mapping each value of the parameter `name` to its
+        index.
+
+        The dictionary is cached and only created again if the parameter
+        values change (including when the values are changed in place or
+        directly in the `parameters` dictionary).
+
+        Parameters
+        ----------
+        name : str
+            Name of the parameter. Its value must be an iterable of
+            hashable values.
+
+        Returns
+        -------
+        dict
+            A dictionary mapping each value to its (first) index.
+
+        Raises
+        ------
+        TypeError
+            If the values of the parameter are not hashable.
+        """
+        values = tuple(self.parameters[name])
+        cached = self._value_index_cache.get(name)
+        if cached is not None:
+            try:
+                if cached[0] == values:
+                    return cached[1]
+            except ValueError:  # pragma: no cover
+                # Values such as numpy arrays can't be compared with ==
+                pass
+        index_map = {}
+        for index, v in enumerate(values):
+            # Keep the first index if a value is repeated, like list.index
+            # does
+            index_map.setdefault(v, index)
+        self._value_index_cache[name] = (values, index_map)
+        return index_map
+
+    def _get_value_index(self, name, value):
+        """
+        Get the index of `value` in the values of the parameter `name`.
+
+        Parameters
+        ----------
+        name : str
+            Name of the parameter.
+        value : anything
+            One of the values of the parameter.
+
+        Returns
+        -------
+        int
+            The index of `value`.
+
+        Raises
+        ------
+        ValueError
+            If `value` is not one of the values of the parameter.
+        """
+        try:
+            return self._get_value_index_map(name)[value]
+        except KeyError:
+            msg = "{0} is not a value of the parameter '{1}'"
+            raise ValueError(msg.format(value, name)) from None
+        except TypeError:
+            # Unhashable values (such as lists) need a linear search
+            return list(self.parameters[name]).index(value)
+
+    def iter_unpacked_params(self):
+        """
+        Get an iterator of SimulationParameters objects, each one
+        corresponding to a possible combination of (unpacked) parameters.
+
+        This is the lazy version of :meth:`get_unpacked_params_list`,
+        where each SimulationParameters object is only created when it is
+        requested. The order is the same of the list returned by
+        :meth:`get_unpacked_params_list`.
+
+        Yields
+        ------
+        SimulationParameters
+            The SimulationParameters object for the next combination of
+            the unpacked parameters.
+
+        Examples
+        --------
+        >>> simparams = SimulationParameters()
+        >>> simparams.add('a', 1)
+        >>> simparams.add('c', [3, 4])
+        >>> simparams.set_unpack_parameter('c')
+        >>> for p in simparams.iter_unpacked_params():
+        ...     print(p.unpack_index, p['a'], p['c'])
+        0 1 3
+        1 1 4
+        """
+        # If unpacked_parameters is empty, there is only self
+        if not self._unpacked_parameters_set:
+            yield self
+            return
+
+        # Using itertools.product we can convert the multiple iterables
+        # (for the different parameters marked to be unpacked) to a single
+        # iterator that returns all the possible combinations (cartesian
+        # product) of the individual iterables. Note that product already
+        # stores the values of each iterable and thus they are passed
+        # directly.
+        yield from self._create_unpacked_params(
+            itertools.product(
+                *[self.parameters[name] for name in self.unpacked_parameters]))
+
+    def _get_unpacked_combinations(self):
+        """
+        Get the (cached) combinations of the values of the unpacked
+        parameters.
+
+        The cache is keyed on a snapshot of the values of the unpacked
+        parameters and thus it is also invalidated when these values are
+        changed directly in the `parameters` dictionary.
+
+        Returns
+        -------
+        list[tuple]
+            The combinations, in the same order as the ones used in
+            :meth:`iter_unpacked_params`. Each combination is a tuple with
+            the value of each unpacked parameter (in the order of the
+            `unpacked_parameters` property).
+        """
+        snapshot = tuple(
+            (name, tuple(self.parameters[name]))
+            for name in self.unpacked_parameters)
+        cached = self._unpacked_params_cache
+        if cached is not None:
+            try:
+                if cached[0] == snapshot:
+                    return cached[1]
+            except ValueError:  # pragma: no cover
+                # Values such as numpy arrays can't be compared with ==
+                pass
+        combinations = list(
+            itertools.product(*[values for _, values in snapshot]))
+        self._unpacked_params_cache = (snapshot, combinations)
+        return combinations
+
+    def _create_unpacked_params(self, all_combinations):
+        """
+        Create a SimulationParameters object for each combination of the
+        values of the unpacked parameters.
+
+        Parameters
+        ----------
+        all_combinations : iterable[tuple]
+            The combinations. Each combination is a tuple with the value of
+            each unpacked parameter (in the order of the
+            `unpacked_parameters` property).
+
+        Yields
+        ------
+        SimulationParameters
+            The SimulationParameters object for the next combination of
+            the unpacked parameters.
+        """
+        # The (sorted) names of the parameters marked to be unpacked. The
+        # predictable order is important, since get_pack_indexes relies on
+        # it.
+        keys = self.unpacked_parameters
+
+        # The parameters that don't need to be unpacked are the same in
+        # all combinations
+        regular_params_dict = {
+            name: self.parameters[name]
+            for name in self.fixed_parameters
+        }
+
+        # Each dictionary corresponds to a possible parameters
+        # combination. Since the dictionary is created here we don't need
+        # to copy it in _create.
+        #
+        # Note that since we are passing the index "i" to each new object
+        # as well as the original SimulationParameters object "self", then
+        # each created SimulationParameters object will know its index
+        # (the _unpack_index variable) as well as the original
+        # SimulationParameters object from where it came from (stored in
+        # the _original_sim_params variable).
+        for i, comb in enumerate(all_combinations):
+            new_dict = dict(zip(keys, comb))
+            new_dict.update(regular_params_dict)
+            yield SimulationParameters._create(new_dict,
+                                               i,
+                                               self,
+                                               copy_params_dict=False)
+
+    def get_unpacked_params_list(self, use_cache=False):
         """
         Get a list of SimulationParameters objects, each one
         corresponding to a possible combination of (unpacked) parameters.
 
+        Parameters
+        ----------
+        use_cache : bool
+            If True, the combinations of the values of the unpacked
+            parameters are cached and reused by the next calls (with
+            `use_cache` also True) while these values don't change. This
+            is opt-in (the default is False), since the cache keeps all
+            combinations in memory, which can be a lot for very large
+            sweeps.
+
         Returns
         -------
         list[SimulationParameters]
            A list of SimulationParameters objects.
 
+        Notes
+        -----
+        New SimulationParameters objects are created in each call, even
+        when `use_cache` is True, and thus they can be changed without
+        affecting the ones returned by other calls.
+
+        See Also
+        --------
+        iter_unpacked_params
+
         Examples
         --------
         Suppose you have a SimulationParameters object with the parameters
@@ -664,66 +973,11 @@ class SimulationParameters(JsonSerializable):
             {'a': 1, 'c': 4, 'b': 2, 'd': 5},
             {'a': 1, 'c': 4, 'b': 2, 'd': 6}]
         """
-        # If unpacked_parameters is empty, return self
-        if not self._unpacked_parameters_set:
-            return [self]
-
-        # Lambda function to get an iterator to a (iterable) parameter
-        # given its name. This only works if self.parameters[name] is an
-        # iterable.
-        def get_iter_from_name(name):
-            return iter(self.parameters[name])
-
-        # Dictionary that stores the name and an iterator of a parameter
-        # marked to be unpacked
-        unpacked_params_iter_dict = OrderedDict()
-        # The sorted function is important to guarantee that the keys
-        # returned from _unpacked_parameters_set will have a predictable
-        # order
-        for i in sorted(self._unpacked_parameters_set):
-            unpacked_params_iter_dict[i] = get_iter_from_name(i)
-        keys = list(unpacked_params_iter_dict.keys())
-
-        # Using itertools.product we can convert the multiple iterators
-        # (for the different parameters marked to be unpacked) to a single
-        # iterator that returns all the possible combinations (cartesian
-        # product) of the individual iterators.
-        all_combinations = itertools.product(
-            *(unpacked_params_iter_dict.values()))
-
-        # Names of the parameters that don't need to be unpacked
-        regular_params = (set(self.parameters.keys()) -
-                          self._unpacked_parameters_set)
-
-        # Constructs a list with dictionaries, where each dictionary
-        # corresponds to a possible parameters combination
-        unpack_params_length = len(self._unpacked_parameters_set)
-        all_possible_dicts_list = []
-        for comb in all_combinations:
-            new_dict = {}
-            # Add current combination of the unpacked parameters
-            for index in range(unpack_params_length):
-                new_dict[keys[index]] = comb[index]
-            # Add the regular parameters
-            for param in regular_params:
-                new_dict[param] = self.parameters[param]
-            all_possible_dicts_list.append(new_dict)
-
-        # Map the list of dictionaries to a list of SimulationParameters
-        # objects and return it.
-        #
-        # Note that since we are passing the index "i" to each new object
-        # in the list as well as the original SimulationParameters object
-        # "self", then each SimulationParameters object in the returned
-        # list will know its index in that list (the _unpack_index
-        # variable) as well as the original SimulationParameters object
-        # from where it came from (stored in the _original_sim_params
-        # variable).
-        sim_params_list = [
-            SimulationParameters._create(v, i, self)
-            for i, v in enumerate(all_possible_dicts_list)
-        ]
-        return sim_params_list
+        if not use_cache or not self._unpacked_parameters_set:
+            return list(self.iter_unpacked_params())
+
+        return list(
+            self._create_unpacked_params(self._get_unpacked_combinations()))
 
     def save_to_pickled_file(self, filename):
         """
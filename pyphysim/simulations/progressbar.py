@@ -606,8 +606,9 @@ class ProgressbarTextBase(ProgressBarBase):  # pylint: disable=R0902,W0223
 
             # We simple change the cursor to the beginning of the line and
             # write the string representation of the prog_bar variable.
-            self._output.write(u'\r')
-            self._output.write(u'{0}'.format(self.prog_bar))
+            # This is done with a single write call, since the output may
+            # be unbuffered.
+            self._output.write(u'\r{0}'.format(self.prog_bar))
 
             # Flush everything to guarantee that at this point
             # everything is written to the output.
@@ -769,9 +770,7 @@ class ProgressbarText(ProgressbarTextBase):
         bartitle = self.__get_initialization_bartitle()
         marker_line1, marker_line2 = self.__get_initialization_markers()
 
-        self._output.write(bartitle)
-        self._output.write(marker_line1)
-        self._output.write(marker_line2)
+        self._output.write(bartitle + marker_line1 + marker_line2)
 
     def _update_iteration(self, count: int) -> None:
         percentage = self._count_to_percent(count)
@@ -1168,6 +1167,12 @@ class ProgressbarDistributedServerBase:
         # Starts unset. Is is set in the _update_progress function
         self.running = multiprocessing.Event()
 
+        # The updater process blocks on this event between two updates of
+        # the progressbar. It is set in the stop_updater method so that the
+        # updater process wakes up and finishes right away, instead of
+        # sleeping for the remaining of the `sleep_time`.
+        self._stop_requested = multiprocessing.Event()
+
         # Each time the start_updater method is called this variable is
         # increased by one and each time the stop_updater method is called
         # it is decreased by one. A started update process will only be
@@ -1312,7 +1317,9 @@ class ProgressbarDistributedServerBase:
                                 output=output)
         count = 0
         while count < self.total_final_count and self.running.is_set():
-            time.sleep(self._sleep_time)
+            # Block until the next update is due (or until the
+            # stop_updater method is called)
+            self._stop_requested.wait(self._sleep_time)
             # Gather information from all client proxybars and update the
             # self._client_data_list member variable
             self._update_client_data_list()
@@ -1380,6 +1387,7 @@ class ProgressbarDistributedServerBase:
 
             self._update_process.daemon = True
 
+            self._stop_requested.clear()
             self.running.set()
             self._update_process.start()
 
@@ -1408,6 +1416,7 @@ class ProgressbarDistributedServerBase:
         self._start_updater_count -= 1
         if self._start_updater_count == 0:
             self.running.clear()
+            self._stop_requested.set()
             # self._toc.value = time.time()
             assert (self._update_process is not None)
             self._update_process.join(timeout)
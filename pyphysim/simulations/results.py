@@ -1,9 +1,9 @@
 #!/usr/bin/env python
 """Module containing simulation result classes."""
 
-from __future__ import division
-
+import copy
 import os.path
+import pickle
 from collections.abc import Iterable
 from typing import Any, Dict, Iterator, List, Optional, cast
 
@@ -11,14 +11,9 @@ import numpy as np
 
 from ..util.misc import (calc_confidence_interval, equal_dicts,
                          replace_dict_values)
-from ..util.serialize import JsonSerializable
+from ..util.serialize import JsonSerializable, get_object_state
 from .parameters import SimulationParameters, combine_simulation_parameters
 
-try:
-    import cPickle as pickle
-except ImportError:  # pragma: no cover
-    import pickle  # type: ignore
-
 try:
     # noinspection PyUnresolvedReferences
     import pandas as pd
@@ -220,6 +215,12 @@ class Result(JsonSerializable):
         CHOICETYPE: "CHOICETYPE",
     }
 
+    # A Result object is created for each result in each iteration of a
+    # simulation. Using __slots__ makes them smaller and faster to access.
+    __slots__ = ('name', '_update_type_code', '_value', '_total',
+                 '_result_sum', '_result_squared_sum', 'num_updates',
+                 '_accumulate_values_bool', '_value_list', '_total_list')
+
     def __init__(self,
                  name: str,
                  update_type_code: ResultType,
@@ -344,6 +345,31 @@ class Result(JsonSerializable):
         """
         return not self.__eq__(other)
 
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Get the state of the Result object for pickling.
+
+        Returns
+        -------
+        dict
+            Dictionary with the value of each attribute, including the
+            ones added by subclasses.
+        """
+        return get_object_state(self)
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """
+        Restore the state of a pickled Result object.
+
+        Parameters
+        ----------
+        state : dict
+            Dictionary with the value of each attribute. This is also the
+            state of Result objects pickled before __slots__ was used.
+        """
+        for name, value in state.items():
+            setattr(self, name, value)
+
     @property
     def accumulate_values_bool(self) -> bool:
         """
@@ -448,11 +474,10 @@ class Result(JsonSerializable):
             v = self._value
             t = self._total
             if t != 0:
-                return "Result -> {0}: {1}/{2} -> {3}".format(
-                    self.name, v, t, v / t)
-            return "Result -> {0}: {1}/{2} -> NaN".format(self.name, v, t)
+                return f"Result -> {self.name}: {v}/{t} -> {v / t}"
+            return f"Result -> {self.name}: {v}/{t} -> NaN"
 
-        return "Result -> {0}: {1}".format(self.name, self.get_result())
+        return f"Result -> {self.name}: {self.get_result()}"
 
     def update(self, value: Any, total: Optional[Any] = None) -> None:
         """
@@ -484,89 +509,137 @@ class Result(JsonSerializable):
         """
         self.num_updates += 1
 
-        # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
-        # Python does not have a switch statement. We use dictionaries as
-        # the equivalent of a switch statement.
-        # First we define a function for each possibility.
-        def __default_update(
-                *_: Any) -> None:  # "*_" denotes the two unused args here
-            """Default update method.
-
-            This will only be called when the update type is not one of the
-            available types. Thus, an exception will be raised.
-
-            """
-            msg = "Can't update a Result object of type '{0}'"
-            raise ValueError(msg.format(self._update_type_code))
-
-        def __update_SUMTYPE_value(p_value: Any, _: Any) -> None:
-            """Update the Result object when its type is SUMTYPE."""
-            self._value += p_value
-            self._result_sum += p_value
-            self._result_squared_sum += p_value**2
+        # This method is called for every result in every iteration of a
+        # simulation. Therefore we dispatch on the update type code with a
+        # plain if/elif chain, ordered from the most to the least common
+        # type, instead of creating the update functions at each call.
+        update_type_code = self._update_type_code
+        if update_type_code == Result.SUMTYPE:
+            self._value += value
+            self._result_sum += value
+            self._result_squared_sum += value**2
             if self._accumulate_values_bool is True:
-                self._value_list.append(p_value)
-
-        def __update_RATIOTYPE_value(p_value: Any, p_total: Any) -> None:
-            """Update the Result object when its type is RATIOTYPE.
+                self._value_list.append(value)
 
-            Raises
-            ------
-            ValueError
-                If the `p_total` parameter is None (not provided).
-            """
-            if p_total is None:
+        elif update_type_code == Result.RATIOTYPE:
+            if total is None:
                 msg = ("A 'p_value' and a 'p_total' are required when "
                        "updating a Result object of the RATIOTYPE type.")
                 raise ValueError(msg)
 
-            self._value += p_value
-            self._total += p_total
+            self._value += value
+            self._total += total
 
-            result = p_value / p_total
+            result = value / total
             self._result_sum += result
             self._result_squared_sum += result**2
 
             if self._accumulate_values_bool is True:
-                self._value_list.append(p_value)
-                self._total_list.append(p_total)
+                self._value_list.append(value)
+                self._total_list.append(total)
 
-        def __update_by_replacing_current_value(p_value: Any, _: Any) -> None:
-            """Update the Result object when its type is MISCTYPE."""
-            self._value = p_value
+        elif update_type_code == Result.MISCTYPE:
+            self._value = value
             if self._accumulate_values_bool is True:
-                self._value_list.append(p_value)
+                self._value_list.append(value)
 
-        def __update_CHOICETYPE_value(p_value: Any, _: Any) -> None:
-            """Update the Result object when its type is CHOICETYPE."""
-            # The provided 'p_value' is used as an index to increase the
+        elif update_type_code == Result.CHOICETYPE:
+            # The provided 'value' is used as an index to increase the
             # choice in self._value, which is stored as a numpy array.
-            assert isinstance(
-                p_value,
-                (int, np.int, np.int32,
-                 np.int64)), ("Value for the CHOICETYPE must be an integer.")
+            assert isinstance(value, (int, np.integer)), (
+                "Value for the CHOICETYPE must be an integer.")
 
-            self._value[p_value] += 1
+            self._value[value] += 1
             self._total += 1
             if self._accumulate_values_bool is True:
-                self._value_list.append(p_value)
+                self._value_list.append(value)
 
-        # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+        else:
+            msg = "Can't update a Result object of type '{0}'"
+            raise ValueError(msg.format(update_type_code))
 
-        # Now we fill the dictionary with the functions
-        possible_updates = {
-            Result.RATIOTYPE: __update_RATIOTYPE_value,
-            Result.MISCTYPE: __update_by_replacing_current_value,
-            Result.SUMTYPE: __update_SUMTYPE_value,
-            Result.CHOICETYPE: __update_CHOICETYPE_value
-        }
+    def update_bulk(self, values: Any, totals: Optional[Any] = None) -> None:
+        """
+        Update the current value with many samples at once.
+
+        This is equivalent to calling :meth:`update` once for each element
+        in `values` (and `totals`), but the sums are computed by numpy.
+        This is much faster when a simulation iteration produces many
+        samples of the same result, which can then be returned as numpy
+        arrays in `_run_simulation` and stored with a single call.
+
+        Parameters
+        ----------
+        values : np.ndarray | list
+            The samples. For the CHOICETYPE these must be integers (the
+            indexes of the choices).
+        totals : np.ndarray | list
+            The totals corresponding to each sample in `values` (only
+            useful for the RATIOTYPE update type).
+
+        See also
+        --------
+        update
+        """
+        update_type_code = self._update_type_code
+
+        if update_type_code == Result.MISCTYPE:
+            # Anything can be stored by the MISCTYPE type and thus we don't
+            # convert the values to a numpy array
+            values = list(values)
+            if values:
+                self.num_updates += len(values)
+                self._value = values[-1]
+                if self._accumulate_values_bool is True:
+                    self._value_list.extend(values)
+            return
+
+        values = np.asarray(values).ravel()
+        if values.size == 0:
+            return
+
+        if update_type_code == Result.SUMTYPE:
+            values_sum = values.sum().item()
+            self._value += values_sum
+            self._result_sum += values_sum
+            self._result_squared_sum += (values**2).sum().item()
+
+        elif update_type_code == Result.RATIOTYPE:
+            if totals is None:
+                msg = ("A 'p_value' and a 'p_total' are required when "
+                       "updating a Result object of the RATIOTYPE type.")
+                raise ValueError(msg)
+            totals = np.asarray(totals).ravel()
+            if totals.shape != values.shape:
+                raise ValueError("'values' and 'totals' must have the same "
+                                 "number of elements.")
+
+            self._value += values.sum().item()
+            self._total += totals.sum().item()
 
-        # Call the appropriated update method. If self._update_type_code
-        #  does not contain a key in the possible_updates dictionary (
-        # that is, a valid update type), then the function
-        # __default_update is called.
-        possible_updates.get(self._update_type_code, __default_update)(value,
-                                                                       total)
+            results = values / totals
+            self._result_sum += results.sum().item()
+            self._result_squared_sum += (results**2).sum().item()
+
+            if self._accumulate_values_bool is True:
+                self._total_list.extend(totals.tolist())
+
+        elif update_type_code == Result.CHOICETYPE:
+            assert np.issubdtype(values.dtype, np.integer), (
+                "Value for the CHOICETYPE must be an integer.")
+
+            # np.add.at correctly handles repeated indexes (and raises an
+            # IndexError for invalid ones)
+            np.add.at(self._value, values, 1)
+            self._total += values.size
+
+        else:
+            msg = "Can't update a Result object of type '{0}'"
+            raise ValueError(msg.format(update_type_code))
+
+        self.num_updates += values.size
+        if self._accumulate_values_bool is True:
+            self._value_list.extend(values.tolist())
 
     def merge(self, other: "Result") -> None:
         """
@@ -602,6 +675,25 @@ class Result(JsonSerializable):
         self._result_sum += other._result_sum
         self._result_squared_sum += other._result_squared_sum
 
+    def reset(self) -> None:
+        """
+        Reset the Result object to the state it had when it was created.
+
+        This allows reusing the same Result object (instead of creating a
+        new one) to store the results of another iteration.
+        """
+        if self._update_type_code == Result.CHOICETYPE:
+            # Zero the current numpy array instead of allocating a new one
+            self._value[:] = 0
+        else:
+            self._value = 0
+        self._total = 0
+        self._result_sum = 0.0
+        self._result_squared_sum = 0.0
+        self.num_updates = 0
+        self._value_list.clear()
+        self._total_list.clear()
+
     def get_result(self) -> Any:
         """
         Get the result stored in the Result object.
@@ -610,13 +702,15 @@ class Result(JsonSerializable):
         -------
         results : anything, but usually a number
             For the RATIOTYPE type get_result will return the
-            `value/total`, while for the other types it will return
-            `value`.
+            `value/total` (or NaN if the total is zero), while for the
+            other types it will return `value`.
         """
         if self.num_updates == 0:
             return "Nothing yet"
 
         if self._update_type_code == Result.RATIOTYPE:
+            if self._total == 0:
+                return float('nan')
             return self._value / self._total
 
         if self._update_type_code == Result.CHOICETYPE:
@@ -850,9 +944,23 @@ class SimulationResults(JsonSerializable):
     Result : Class to store a single simulation result.
 
     """
+    # Note that, differently from Result and SimulationParameters,
+    # SimulationResults does not use __slots__. There are only a few
+    # SimulationResults objects in a simulation (one per combination of
+    # parameters, plus the ones merged into them) and the simulation
+    # runner sets attributes on them that are not defined in the class
+    # (such as 'rep_max' and 'elapsed_time'), which would not be possible
+    # with __slots__. The memory is in the Result objects they hold.
+
     def __init__(self) -> None:
         super().__init__()
-        self._results: Dict[str, List[Result]] = dict()
+        # Last (usually the only) Result object stored for each name. This
+        # is the Result object that is merged in merge_all_results.
+        self._results: Dict[str, Result] = dict()
+        # Names for which more than one Result object was stored with
+        # append_result are also in this dictionary, which stores all of
+        # their Result objects (including the last one).
+        self._appended: Dict[str, List[Result]] = dict()
 
         # This will store the simulation parameters used in the simulation
         # that resulted in the results. This should be set by calling the
@@ -902,7 +1010,9 @@ class SimulationResults(JsonSerializable):
         aux = equal_dicts(
             self.__dict__,
             other.__dict__,
-            ignore_keys=['elapsed_time', '_results', 'original_filename'])
+            ignore_keys=[
+                'elapsed_time', '_results', '_appended', 'original_filename'
+            ])
 
         if aux is False:
             return False
@@ -936,6 +1046,28 @@ class SimulationResults(JsonSerializable):
         """
         return not self.__eq__(other)
 
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """
+        Restore the state of a pickled SimulationResults object.
+
+        Objects pickled before the `_appended` dictionary was introduced
+        stored a list of Result objects for each name in `_results`.
+        These are converted to the current representation.
+
+        Parameters
+        ----------
+        state : dict
+            The pickled state.
+        """
+        if '_appended' not in state:
+            old_results = state['_results']
+            state['_results'] = {n: v[-1] for n, v in old_results.items()}
+            state['_appended'] = {
+                n: v
+                for n, v in old_results.items() if len(v) > 1
+            }
+        self.__dict__.update(state)
+
     @property
     def params(self) -> SimulationParameters:
         """Get method for the params property."""
@@ -984,8 +1116,8 @@ class SimulationResults(JsonSerializable):
         result : Result
             The Result object to add to the simulation results.
         """
-        # Added as a list with a single element
-        self._results[result.name] = [result]
+        self._results[result.name] = result
+        self._appended.pop(result.name, None)
 
     def add_new_result(self,
                        name: str,
@@ -1052,10 +1184,14 @@ class SimulationResults(JsonSerializable):
         --------
         append_all_results, merge_all_results
         """
-        if result.name in self._results.keys():
-            update_type_code = self._results[result.name][0].type_code
-            if update_type_code == result.type_code:
-                self._results[result.name].append(result)
+        name = result.name
+        if name in self._results:
+            if self._results[name].type_code == result.type_code:
+                # The list is only created when a second Result object is
+                # appended
+                self._appended.setdefault(name,
+                                          [self._results[name]]).append(result)
+                self._results[name] = result
             else:
                 raise ValueError("Can only append to results of the same type")
         else:
@@ -1105,38 +1241,97 @@ class SimulationResults(JsonSerializable):
         This method is used in the SimulationRunner class to combine
         results of two simulations for the exact same parameters.
         """
+        # pylint: disable=W0212
+        results = self._results
+        other_results = other._results
+
         # If the current SimulationResults object is empty, we basically
-        # copy the Result objects from other
-        if len(self) == 0:
-            for name in other.get_result_names():
-                self._results[name] = other[name]
+        # copy the Result objects from other. They are (deep) copied,
+        # since the Result objects in `other` may still be changed later
+        # (e.g. the simulation runner reuses them in the next repetition).
+        # Both dictionaries are copied at once to keep the last appended
+        # Result the same object as the one in `_results`.
+        if not results:
+            other_results, other_appended = copy.deepcopy(
+                (other_results, other._appended))
+            results.update(other_results)
+            self._appended.update(other_appended)
+            return
+
         # Otherwise, we merge each Result from `self` with the Result from
         # `other`
-        else:
-            for item in self.get_result_names():
-                # The 'num_skipped_reps' result is different from the other
-                # results in the sense that it is created by the
-                # SimulationRunner class to count how many times a
-                # SkipThisOne exception is raised. It is not created at the
-                # same time as the other Result objects, but we want to
-                # allow merging two SimulationResults objects even if one
-                # of them does not have a 'num_skipped_reps' Result object.
-                if item != 'num_skipped_reps':
-                    self._results[item][-1].merge(other[item][-1])
-
-            # Merge the 'num_skipped_reps' Result if the second object has
-            # it.
-            if 'num_skipped_reps' in other.get_result_names():
-                # It the second SimulationResults has the the
-                # 'num_skipped_reps' Result, but the first one has not,
-                # then first we create a 'num_skipped_reps' Result for the
-                # first SimulationResults object.
-                if 'num_skipped_reps' not in self.get_result_names():
-                    self.add_new_result('num_skipped_reps', Result.SUMTYPE, 0)
-
-                # Now we merge 'num_skipped_reps' from both of them
-                self._results['num_skipped_reps'][-1].merge(
-                    other['num_skipped_reps'][-1])
+        for name, result in results.items():
+            # The 'num_skipped_reps' result is different from the other
+            # results in the sense that it is created by the
+            # SimulationRunner class to count how many times a SkipThisOne
+            # exception is raised. It is not created at the same time as
+            # the other Result objects, but we want to allow merging two
+            # SimulationResults objects even if one of them does not have a
+            # 'num_skipped_reps' Result object.
+            if name != 'num_skipped_reps':
+                result.merge(other_results[name])
+
+        # Merge the 'num_skipped_reps' Result if the second object has it.
+        other_num_skipped_reps = other_results.get('num_skipped_reps')
+        if other_num_skipped_reps is not None:
+            # It the second SimulationResults has the the
+            # 'num_skipped_reps' Result, but the first one has not, then
+            # first we create a 'num_skipped_reps' Result for the first
+            # SimulationResults object.
+            if 'num_skipped_reps' not in results:
+                self.add_new_result('num_skipped_reps', Result.SUMTYPE, 0)
+
+            # Now we merge 'num_skipped_reps' from both of them
+            results['num_skipped_reps'].merge(other_num_skipped_reps)
+
+    def merge_scalars(self, updates: Dict[str, Any]) -> None:
+        """
+        Update the stored results with the values of one more iteration.
+
+        This is a faster alternative to :meth:`merge_all_results` when
+        the results of an iteration are just scalars (or numpy arrays),
+        since no SimulationResults and Result objects need to be created
+        for them.
+
+        Parameters
+        ----------
+        updates : dict
+            Dictionary mapping the name of each result to be updated to
+            its new value, or to a tuple `(value, total)` for results of
+            the RATIOTYPE type. Each Result is updated as in
+            :meth:`Result.update`. The results must be already stored in
+            the SimulationResults object and, similarly to
+            :meth:`merge_all_results`, only the last one is updated when
+            more than one Result is stored for the same name.
+
+        Raises
+        ------
+        KeyError
+            If no result is stored for one of the names in `updates`.
+        """
+        results = self._results
+        for name, update in updates.items():
+            if isinstance(update, tuple):
+                results[name].update(*update)
+            else:
+                results[name].update(update)
+
+    def reset_values(self) -> None:
+        """
+        Reset all Result objects stored in the SimulationResults object.
+
+        The stored Result objects (and their names) are kept, but their
+        values are reset as if no update was ever performed. This allows
+        reusing the same SimulationResults object to store the results of
+        another iteration of a simulation.
+
+        See also
+        --------
+        Result.reset
+        """
+        for results in self:
+            for result in results:
+                result.reset()
 
     def get_result_names(self) -> List[str]:
         """
@@ -1280,10 +1475,9 @@ class SimulationResults(JsonSerializable):
         List[Result]
             The desired results.
         """
-        # if key in self._results.keys():
-        return self._results[key]
-        # else:
-        #     raise KeyError("Invalid key: %s" % key)
+        if key in self._appended:
+            return self._appended[key]
+        return [self._results[key]]
 
     def __len__(self) -> int:
         """Get the number of results stored in self.
@@ -1304,7 +1498,7 @@ class SimulationResults(JsonSerializable):
         Get an iterator to the results stored in the SimulationResults
         object.
         """
-        return iter(self._results.values())
+        return (self[name] for name in self._results)
 
     def get_filename_with_replaced_params(self, filename: str) -> str:
         """
@@ -1371,8 +1565,8 @@ class SimulationResults(JsonSerializable):
         # -----------------------------------------------------------------
 
         results = {
-            n: list_of_results_to_list_of_dicts(v)
-            for n, v in self._results.items()
+            n: list_of_results_to_list_of_dicts(self[n])
+            for n in self._results
         }
 
         d = {
@@ -1418,16 +1612,13 @@ class SimulationResults(JsonSerializable):
             out = [Result.from_dict(r) for r in result_list]
             return out
 
-        results = {
-            n: list_of_dicts_to_list_of_results(v)
-            for n, v in d['results'].items()
-        }
-
         simresults = SimulationResults()
         simresults._params = SimulationParameters.from_dict(d['params'])
         simresults.runned_reps = d['runned_reps']
         simresults.original_filename = d['original_filename']
-        simresults._results = results
+        for result_list in d['results'].values():
+            for result in list_of_dicts_to_list_of_results(result_list):
+                simresults.append_result(result)
 
         return simresults
 
@@ -1,12 +1,19 @@
 #!/usr/bin/env python
 """Module containing the simulation runner."""
 
+import copy
+import inspect
 import itertools
 import os
 import sys
 from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from time import time
-from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from typing import (Any, Callable, Deque, Dict, Iterable, Iterator, List,
+                    Optional, Set, Tuple, Union, cast)
+
+import numpy as np
 
 from pyphysim.simulations.progressbar import (ProgressBarBase,
                                               ProgressbarZMQClient)
@@ -18,6 +25,19 @@ from .progressbar import (ProgressBarIPython, ProgressbarText,
                           ProgressbarZMQServer)
 from .results import Result, SimulationResults
 
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:  # pragma: no cover
+    HAS_NUMBA = False
+
+    def njit(*args: Any, **kwargs: Any) -> Any:
+        """Replacement for numba.njit when numba is not available."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
 try:
     # noinspection PyUnresolvedReferences
     from ipyparallel import LoadBalancedView, DirectView
@@ -25,7 +45,10 @@ except ImportError:  # pragma: no cover
     LoadBalancedView = Any
     DirectView = Any
 
-__all__ = ["get_partial_results_filename", "SimulationRunner", "SkipThisOne"]
+__all__ = [
+    "get_partial_results_filename", "SimulationRunner", "SkipThisOne",
+    "HAS_NUMBA", "njit"
+]
 
 UpdateFunction = Callable[[int], None]
 
@@ -142,6 +165,73 @@ def get_partial_results_filename(
     return partial_results_filename
 
 
+def _spawn_worker_seeds(num_seeds: int) -> List[int]:
+    """
+    Get independent seeds for `num_seeds` worker processes.
+
+    The seeds are spawned from a `np.random.SeedSequence` whose entropy is
+    drawn from the global numpy random number generator. This means that
+    the seeds are reproducible if `np.random.seed` was called before.
+
+    Parameters
+    ----------
+    num_seeds : int
+        The number of seeds.
+
+    Returns
+    -------
+    list[int]
+        The seeds.
+    """
+    seed_seq = np.random.SeedSequence(np.random.randint(2**31 - 1))
+    return [
+        int(child.generate_state(1)[0])
+        for child in seed_seq.spawn(num_seeds)
+    ]
+
+
+def _find_random_generators(
+        obj: Any) -> List[Union[np.random.RandomState, np.random.Generator]]:
+    """
+    Find the numpy random number generators held by `obj`.
+
+    The attributes of `obj` are searched recursively, including the
+    elements of lists, tuples and dictionaries and the attributes of other
+    objects (but not SimulationParameters and SimulationResults objects).
+
+    Parameters
+    ----------
+    obj : any
+        The object (usually a SimulationRunner).
+
+    Returns
+    -------
+    list[np.random.RandomState | np.random.Generator]
+        The random number generators, in the order they were found.
+    """
+    generators: List[Union[np.random.RandomState, np.random.Generator]] = []
+    visited: Set[int] = set()
+    to_visit = [obj]
+    while to_visit:
+        current = to_visit.pop()
+        if id(current) in visited:
+            continue
+        visited.add(id(current))
+
+        if isinstance(current, (np.random.RandomState, np.random.Generator)):
+            generators.append(current)
+        elif isinstance(current, (list, tuple)):
+            to_visit.extend(reversed(current))
+        elif isinstance(current, dict):
+            to_visit.extend(reversed(list(current.values())))
+        elif (hasattr(current, '__dict__')
+              and not isinstance(current, (type, SimulationParameters,
+                                           SimulationResults))):
+            to_visit.extend(reversed(list(vars(current).values())))
+
+    return generators
+
+
 # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 # xxxxxxxxxxxxxxx Exception xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
@@ -235,6 +325,28 @@ class SimulationRunner:
     With that, all there is left to run the simulation is to create a
     SomeSimulator object and call its :meth:`simulate` method.
 
+    Usually most of the simulation time is spent in the numerical inner
+    loops of :meth:`_run_simulation`. These can be factored into a
+    function operating only on numpy arrays and scalars and compiled with
+    numba, either with the `njit` decorator exported by this module (which
+    does nothing if numba is not installed) or with :meth:`_jit_kernel`.
+
+    .. code-block:: python
+
+       @njit(cache=True)
+       def count_errors(sent, received):
+           num_errors = 0
+           for i in range(sent.size):
+               if sent[i] != received[i]:
+                   num_errors += 1
+           return num_errors
+
+       class SomeSimulator(SimulationRunner):
+           ...
+           def _run_simulation(self, current_parameters):
+               ...
+               num_errors = count_errors(sent, received)
+
     Parameters
     ----------
     default_config_file : str
@@ -249,6 +361,15 @@ class SimulationRunner:
         they can be easily changed later. Note that if the config file does
         not exist at all, then it will be saved regardless of the value of
         `save_parsed_file`.
+    n_jobs : int, optional
+        Number of worker processes used by the :meth:`simulate` method to
+        simulate the different combinations of (unpacked) parameters in
+        parallel. The default value of 1 simulates all combinations
+        serially in the current process. If this is None or a negative
+        number, then the number of CPUs is used. Each combination of
+        parameters re-seeds the random number generators with its own seed
+        (see :meth:`_reseed`) and its repetitions are run serially in the
+        worker process (`reps_n_jobs` is ignored).
 
     See Also
     --------
@@ -260,8 +381,41 @@ class SimulationRunner:
                  default_config_file: Optional[str] = None,
                  config_spec: Optional[str] = None,
                  read_command_line_args: bool = True,
-                 save_parsed_file: bool = False) -> None:
+                 save_parsed_file: bool = False,
+                 n_jobs: Optional[int] = 1) -> None:
         self.rep_max = 1
+        # Number of worker processes used in the simulate method. See the
+        # `n_jobs` argument in the class documentation.
+        self.n_jobs = n_jobs
+        # Number of worker processes used to run the repetitions of each
+        # combination of parameters in parallel. This is only used when
+        # the _keep_going method is not reimplemented in a subclass, since
+        # otherwise each repetition depends on the results of the previous
+        # ones. If this is None or a negative number, then the number of
+        # CPUs is used. Each chunk of repetitions receives its own seed and
+        # the random number generators are re-seeded with it by the
+        # _reseed method.
+        self.reps_n_jobs: Optional[int] = 1
+
+        # xxxxx Convergence based stop criterion xxxxxxxxxxxxxxxxxxxxxxxxxx
+        # If both target_relative_precision and convergence_result_name
+        # are set, then the default _keep_going method stops the
+        # simulation of each combination of parameters when the relative
+        # change of the result with name convergence_result_name in the
+        # last convergence_window repetitions is not greater than
+        # target_relative_precision.
+        self.target_relative_precision: Optional[float] = None
+        self.convergence_result_name: Optional[str] = None
+        self.convergence_window = 10
+        # The convergence criterion is only checked after at least min_reps
+        # repetitions were run
+        self.min_reps = 0
+        # Values of the convergence result in the last repetitions (for
+        # the current combination of parameters). This is filled in the
+        # simulate method.
+        self._convergence_values: Deque[Any] = deque()
+        # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+
         # Number of iterations performed by simulation when it finished
         self._runned_reps: List[int] = []
 
@@ -354,6 +508,14 @@ class SimulationRunner:
         # message will be printed either.
         self.progressbar_message = 'Progress'
 
+        # The progressbar of the serial simulation is only updated once
+        # every progress_update_interval repetitions (and when the
+        # simulation of the current parameters finishes). If this is None
+        # then it is updated about 200 times, that is, every rep_max // 200
+        # repetitions. Set it to 1 to update the progressbar after every
+        # repetition.
+        self.progress_update_interval: Optional[int] = None
+
         # This variable will be used to store the AsyncMapResult object
         # that will be created in the simulate_in_parallel method. This
         # object is part of ipyparallel framework and is used to get
@@ -564,8 +726,10 @@ class SimulationRunner:
                 partial_results_filename)
         except IOError as e:
             if self.partial_results_folder is not None:
-
-                os.mkdir(self.partial_results_folder)
+                # Note that other processes may be creating the folder at
+                # the same time when the simulation is performed in
+                # parallel
+                os.makedirs(self.partial_results_folder, exist_ok=True)
                 # This should not raise IOError again.
                 filename = current_sim_results.save_to_file(
                     partial_results_filename)
@@ -591,8 +755,10 @@ class SimulationRunner:
         self.results = SimulationResults()
 
     def __run_simulation_and_track_elapsed_time(
-            self,
-            current_parameters: SimulationParameters) -> SimulationResults:
+        self,
+        current_parameters: SimulationParameters,
+        out: Optional[SimulationResults] = None
+    ) -> Union[SimulationResults, Dict[str, Any]]:
         """
         Perform the _run_simulation method and track its execution time.
         This time will be added as a Result to the returned
@@ -605,25 +771,72 @@ class SimulationRunner:
             simulation. The self.params variable is not used directly. It
             is first unpacked in the simulate function which then calls
             _run_simulation for each combination of unpacked parameters.
+        out : SimulationResults, optional
+            The (already reset) results of a previous iteration that can be
+            reused. They are passed to _run_simulation as the `out`
+            argument. This must only be provided if
+            :meth:`_can_reuse_results` returns True.
 
         Returns
         -------
-        SimulationResults
-            The current simulation results.
+        SimulationResults | dict
+            The current simulation results. If this is a dictionary it must
+            be merged with :meth:`_merge_scalar_results`.
 
         Notes
         -----
         This method is called in the `simulate` and `simulate_in_parallel`.
         """
         tic = time()
-        current_sim_results = self._run_simulation(current_parameters)
+        if out is None:
+            current_sim_results = self._run_simulation(current_parameters)
+        else:
+            # noinspection PyArgumentList
+            current_sim_results = self._run_simulation(  # type: ignore
+                current_parameters, out=out)
         toc = time()
+        if isinstance(current_sim_results, dict):
+            current_sim_results['elapsed_time'] = toc - tic
+            return current_sim_results
+
         elapsed_time_result = Result.create('elapsed_time', Result.SUMTYPE,
                                             toc - tic)
         current_sim_results.add_result(elapsed_time_result)
 
         return current_sim_results
 
+    @staticmethod
+    def _merge_scalar_results(sim_results: Optional[SimulationResults],
+                              new_results: Dict[str, Any]) -> None:
+        """
+        Merge the dictionary returned by one repetition of
+        :meth:`_run_simulation` into the results of the previous
+        repetitions.
+
+        Parameters
+        ----------
+        sim_results : SimulationResults | None
+            The merged results of the previous repetitions (None in the
+            first repetition).
+        new_results : dict
+            The dictionary returned by :meth:`_run_simulation`.
+
+        Raises
+        ------
+        TypeError
+            If `sim_results` does not have a result for every name in
+            `new_results`, such as in the first repetition.
+        """
+        if sim_results is None or not set(new_results).issubset(
+                sim_results.get_result_names()):
+            # There are no Result objects to merge the plain values into
+            raise TypeError(
+                "_run_simulation can only return a dict when the results of"
+                " the previous repetitions (such as the first one, which"
+                " must be a SimulationResults object) have all the result"
+                " names in the dict")
+        sim_results.merge_scalars(new_results)
+
     def _run_simulation(
             self,
             current_parameters: SimulationParameters) -> SimulationResults:
@@ -640,6 +853,29 @@ class SimulationRunner:
         reimplementing the _keep_going function in the derived class) and
         the results from multiple repetitions will be merged.
 
+        A subclass can optionally accept an extra `out=None` argument. In
+        that case, after the first repetition (or the first one after
+        loading partial results), `out` is the :class:`.SimulationResults`
+        object returned by a previous repetition (or a copy of it, if that
+        is where the results are merged into) with all values reset (see
+        :meth:`.SimulationResults.reset_values`). Updating the
+        Result objects in `out` and returning it avoids creating new
+        SimulationResults and Result objects in every repetition.
+        Alternatively, in any repetition after the first one (such as
+        whenever `out` is not None) `_run_simulation` can return a
+        dictionary mapping result names to their values (or to
+        `(value, total)` tuples for the RATIOTYPE results), which is
+        merged with :meth:`.SimulationResults.merge_scalars`. The names
+        must be the ones of the results returned in the previous
+        repetitions. This is the fastest option when each repetition only
+        produces a few scalars.
+
+        If one iteration produces many samples of the same result (such
+        as the number of errors of many independent blocks) it is much
+        faster to compute them as numpy arrays and store them with a
+        single call to :meth:`.Result.update_bulk` than to update the
+        result once for each sample.
+
         Parameters
         ----------
         current_parameters : SimulationParameters
@@ -658,6 +894,82 @@ class SimulationRunner:
         raise NotImplementedError("'_run_simulation' must be implemented "
                                   "in a subclass of SimulationRunner")
 
+    def _can_reuse_results(self) -> bool:
+        """
+        Check if the :meth:`_run_simulation` method accepts an `out`
+        argument to reuse the results of a previous repetition.
+
+        Returns
+        -------
+        bool
+            True if `_run_simulation` accepts the `out` argument.
+        """
+        return 'out' in inspect.signature(self._run_simulation).parameters
+
+    def _reseed(self, seed: int) -> None:
+        """
+        Re-seed the random number generators used in
+        :meth:`_run_simulation`.
+
+        This is called in the worker processes (with a different seed for
+        each one of them) before they run any repetition. Otherwise they
+        would all replay the same random values, since they receive a copy
+        of the state of the random number generators in the current
+        process.
+
+        The global numpy random number generator is re-seeded, as well as
+        every `np.random.RandomState` and `np.random.Generator` object
+        found in the attributes of this object (see
+        `_find_random_generators`), each one with a different seed derived
+        from `seed`. Reimplement this method in a subclass if
+        :meth:`_run_simulation` uses other random number generators.
+
+        Parameters
+        ----------
+        seed : int
+            The seed (a non-negative integer smaller than 2**32).
+        """
+        generators = _find_random_generators(self)
+        child_seeds = np.random.SeedSequence(seed).spawn(len(generators) + 1)
+        np.random.seed(child_seeds[0].generate_state(4))
+        for generator, child_seed in zip(generators, child_seeds[1:]):
+            if isinstance(generator, np.random.RandomState):
+                generator.seed(child_seed.generate_state(4))
+            else:
+                bit_generator = generator.bit_generator
+                bit_generator.state = type(bit_generator)(child_seed).state
+
+    @staticmethod
+    def _jit_kernel(func: Callable[..., Any], **options: Any) -> Any:
+        """
+        Compile a numerical kernel used in :meth:`_run_simulation` with
+        numba.
+
+        The kernel is compiled in nopython mode with `cache=True` (so that
+        the compiled code is reused by later runs and by the worker
+        processes) and `fastmath=True`, unless overridden in `options`.
+        If numba is not installed then `func` is returned unchanged.
+
+        Parameters
+        ----------
+        func : callable
+            The function to compile. It must only use numpy arrays,
+            scalars and the subset of python and numpy supported by numba.
+        **options
+            Extra options passed to `numba.njit`.
+
+        Returns
+        -------
+        callable
+            The compiled function (or `func` itself if numba is not
+            available).
+        """
+        if not HAS_NUMBA:  # pragma: no cover
+            return func
+        options.setdefault('cache', True)
+        options.setdefault('fastmath', True)
+        return njit(**options)(func)
+
     # pylint: disable=W0613,R0201
     def _keep_going(self, current_params: SimulationParameters,
                     current_sim_results: SimulationResults,
@@ -691,11 +1003,75 @@ class SimulationRunner:
         -----
         This method should be simple (it will be run many times) and SHOULD
         NOT modify the object.
+
+        If the `target_relative_precision` and `convergence_result_name`
+        attributes are set, the default implementation returns False
+        when at least `min_reps` repetitions were run and the result with
+        name `convergence_result_name` converged. That is, when the
+        relative change of its value in the last `convergence_window`
+        repetitions, given by
+        :math:`\\max_i |v_i - v_{t-k}| / |v_{t-k}|` where :math:`k` is
+        `convergence_window`, is not greater than
+        `target_relative_precision`. The result is never considered
+        converged while its reference value :math:`v_{t-k}` is zero (e.g.
+        no bit errors observed yet) or while any value in the window is
+        not finite (e.g. a RATIOTYPE result with a zero total). Otherwise
+        it always returns True and the simulation only stops when
+        `rep_max` repetitions are run.
+        """
+        if not self._uses_convergence_criterion():
+            # The simulation will only stop when the maximum number of
+            # allowed iterations is reached.
+            return True
+
+        if current_rep < self.min_reps:
+            return True
+
+        # The values of the convergence result in the last repetitions are
+        # stored in self._convergence_values by the simulate method
+        if len(self._convergence_values) <= self.convergence_window:
+            return True
+
+        values = np.asarray(self._convergence_values, dtype=float)
+        reference = np.abs(values[0])
+        # The relative change is not defined in these cases. A constant
+        # zero value usually only means that not enough repetitions were
+        # run (such as for a very low error rate).
+        if np.any(reference == 0) or not np.all(np.isfinite(values)):
+            return True
+        relative_change = np.abs(values[1:] - values[0]) / reference
+        return bool(np.max(relative_change) > self.target_relative_precision)
+
+    def _uses_convergence_criterion(self) -> bool:
         """
-        # If this function is not reimplemented in a subclass it always
-        # returns True. Therefore, the simulation will only stop when the
-        # maximum number of allowed iterations is reached.
-        return True
+        Check if the convergence based stop criterion is used by the
+        default :meth:`_keep_going`.
+
+        Returns
+        -------
+        bool
+            True if both `target_relative_precision` and
+            `convergence_result_name` are set.
+        """
+        return (self.target_relative_precision is not None
+                and self.convergence_result_name is not None)
+
+    def _store_convergence_value(
+            self, current_sim_results: SimulationResults) -> None:
+        """
+        Store the current value of the convergence result, if the
+        convergence based stop criterion is used.
+
+        Parameters
+        ----------
+        current_sim_results : SimulationResults
+            The results of all repetitions run so far for the current
+            parameters.
+        """
+        if self._uses_convergence_criterion():
+            name = cast(str, self.convergence_result_name)
+            self._convergence_values.append(
+                current_sim_results[name][-1].get_result())
 
     def _get_serial_update_progress_function(
         self, current_params: SimulationParameters
@@ -952,6 +1328,12 @@ class SimulationRunner:
         # iterations for each combination of simulation parameters.
         self._on_simulate_current_params_start(current_params)
 
+        # Results of a previous repetition which can be reused (if
+        # _run_simulation accepts the 'out' argument). They are reset as
+        # soon as they were merged into current_sim_results.
+        reusable_results: Optional[SimulationResults] = None
+        can_reuse_results = self._can_reuse_results()
+
         # First we try to Load the partial results for the current
         # parameters.
         try:
@@ -1002,14 +1384,42 @@ class SimulationRunner:
         # try/except block will run as usual.
         except IOError:
             # Perform the first iteration of _run_simulation
-            current_sim_results = \
-                self.__run_simulation_and_track_elapsed_time(
-                    current_params)
+            first_results = self.__run_simulation_and_track_elapsed_time(
+                current_params)
+            if isinstance(first_results, dict):
+                # This raises a TypeError, since there are no results to
+                # merge the dict into
+                self._merge_scalar_results(None, first_results)
+            current_sim_results = cast(SimulationResults, first_results)
+            if can_reuse_results:
+                # current_sim_results is where the next repetitions are
+                # merged into, so a copy is what the second one reuses
+                reusable_results = copy.deepcopy(current_sim_results)
+                reusable_results.reset_values()
             # Add the extra 'num_skipped_reps' Result.
             current_sim_results.add_new_result('num_skipped_reps',
                                                Result.SUMTYPE, 0)
             current_rep = 1
 
+        if self._can_simulate_reps_in_parallel(current_rep):
+            # The remaining repetitions are run in worker processes and
+            # the while loop below will not run
+            current_rep = self._simulate_reps_with_process_pool(
+                current_params, current_sim_results, current_rep,
+                update_progress_func)
+
+        # Only the last convergence_window + 1 values are needed by the
+        # convergence criterion in _keep_going
+        self._convergence_values = deque(maxlen=self.convergence_window + 1)
+        self._store_convergence_value(current_sim_results)
+
+        # Writing the progress for each repetition can take more time than
+        # the repetitions themselves when they are fast
+        if self.progress_update_interval is None:
+            progress_update_interval = max(1, self.rep_max // 200)
+        else:
+            progress_update_interval = max(1, self.progress_update_interval)
+
         last_tic = time()
         # Run more iterations until one of the stop criteria is
         # reached. Note that if partial results were loaded successfully
@@ -1023,12 +1433,23 @@ class SimulationRunner:
                 # new results. If `_run_simulation` raises a SkipThisOne
                 # exception, then we do not increase current_rep or the
                 # current progress, since there is no new result to merge.
-                current_sim_results.merge_all_results(
-                    self.__run_simulation_and_track_elapsed_time(
-                        current_params))
+                new_results = self.__run_simulation_and_track_elapsed_time(
+                    current_params, reusable_results)
+                if isinstance(new_results, dict):
+                    # reusable_results was not changed and is passed
+                    # again without being reset
+                    self._merge_scalar_results(current_sim_results,
+                                               new_results)
+                else:
+                    current_sim_results.merge_all_results(new_results)
+                    if can_reuse_results:
+                        reusable_results = new_results
+                        reusable_results.reset_values()
+                self._store_convergence_value(current_sim_results)
 
                 current_rep += 1
-                update_progress_func(current_rep)
+                if current_rep % progress_update_interval == 0:
+                    update_progress_func(current_rep)
             except SkipThisOne:
                 # Each time a SkipThisOne exception is raised we increase
                 # the num_skipped_reps_reps result to indicate that, but we
@@ -1157,6 +1578,190 @@ class SimulationRunner:
         return obj._simulate_for_current_params_common(current_params,
                                                        update_progress_func)
 
+    # This method is run in another process. Therefore, the python coverage
+    # program cannot see that it is actually used.
+    @staticmethod
+    def _simulate_for_current_params_in_pool(
+        obj: "SimulationRunner", current_params: SimulationParameters,
+        seed: int
+    ) -> Tuple[int, SimulationResults, str]:  # pragma: no cover
+        """
+        Simulate the current parameters in a worker process of the pool
+        created by :meth:`_simulate_with_process_pool`.
+
+        Parameters
+        ----------
+        obj : SimulationRunner
+            The same as the self parameter in regular methods. The reason
+            that this method is set to static is to allow it to be pickled.
+        current_params : SimulationParameters
+            The current parameters
+        seed : int
+            The seed used to re-seed the random number generators (see
+            :meth:`_reseed`).
+
+        Returns
+        -------
+        (int, SimulationResults, str)
+            The value of `current_rep`, the current results as a
+            SimulationResults object, and the name of the file storing
+            partial results.
+        """
+        obj._reseed(seed)
+        # The combinations of parameters are already simulated in
+        # parallel. Starting another pool of processes (for the
+        # repetitions) inside each worker would only oversubscribe the
+        # CPUs.
+        obj.reps_n_jobs = 1
+        return SimulationRunner._simulate_for_current_params_parallel(
+            obj, current_params)
+
+    def _can_simulate_reps_in_parallel(self, current_rep: int) -> bool:
+        """
+        Check if the remaining repetitions for the current parameters can
+        be run in parallel.
+
+        Parameters
+        ----------
+        current_rep : int
+            Number of repetitions already run.
+
+        Returns
+        -------
+        bool
+            True if the repetitions should be run in worker processes.
+        """
+        # If _keep_going was reimplemented (or the convergence criterion is
+        # used) the decision to run one more repetition depends on the
+        # results of the previous ones
+        return (self.reps_n_jobs != 1
+                and type(self)._keep_going is SimulationRunner._keep_going
+                and not self._uses_convergence_criterion()
+                and self.rep_max - current_rep > 1)
+
+    def _simulate_reps_with_process_pool(
+            self, current_params: SimulationParameters,
+            current_sim_results: SimulationResults, current_rep: int,
+            update_progress_func: UpdateFunction) -> int:
+        """
+        Run the remaining repetitions for the current parameters in a pool
+        of `self.reps_n_jobs` worker processes.
+
+        The results of the repetitions are merged into
+        `current_sim_results` (in place).
+
+        Parameters
+        ----------
+        current_params : SimulationParameters
+            The current parameters.
+        current_sim_results : SimulationResults
+            The results of the repetitions already run.
+        current_rep : int
+            Number of repetitions already run.
+        update_progress_func : (int) -> []
+            The function that can be called to update the current progress.
+
+        Returns
+        -------
+        int
+            The new value of `current_rep`, which is equal to
+            `self.rep_max`.
+        """
+        max_workers = self.reps_n_jobs
+        if max_workers is None or max_workers < 0:
+            max_workers = os.cpu_count() or 1
+
+        # Split the remaining repetitions into a few chunks per worker so
+        # that the progress can be updated while the simulation runs
+        remaining_reps = self.rep_max - current_rep
+        num_chunks = min(remaining_reps, 4 * max_workers)
+        quotient, remainder = divmod(remaining_reps, num_chunks)
+        chunk_sizes = ([quotient + 1] * remainder + [quotient] *
+                       (num_chunks - remainder))
+
+        # Each chunk re-seeds the random number generators with its own
+        # seed (see _reseed). Otherwise all chunks would replay the same
+        # random values.
+        seeds = _spawn_worker_seeds(num_chunks)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            all_chunks_results = executor.map(
+                SimulationRunner._simulate_reps_in_worker,
+                [self] * num_chunks, [current_params] * num_chunks,
+                chunk_sizes, seeds)
+            for num_reps, (chunk_results, num_skipped) in zip(
+                    chunk_sizes, all_chunks_results):
+                current_sim_results.merge_all_results(chunk_results)
+                current_sim_results['num_skipped_reps'][-1].update(
+                    num_skipped)
+                current_rep += num_reps
+                update_progress_func(current_rep)
+
+        return current_rep
+
+    # This method is run in another process. Therefore, the python coverage
+    # program cannot see that it is actually used.
+    @staticmethod
+    def _simulate_reps_in_worker(
+        obj: "SimulationRunner",
+        current_params: SimulationParameters,
+        num_reps: int,
+        seed: Optional[int] = None
+    ) -> Tuple[SimulationResults, int]:  # pragma: no cover
+        """
+        Run `num_reps` repetitions of the simulation for the current
+        parameters.
+
+        Parameters
+        ----------
+        obj : SimulationRunner
+            The same as the self parameter in regular methods. The reason
+            that this method is set to static is to allow it to be pickled.
+        current_params : SimulationParameters
+            The current parameters
+        num_reps : int
+            The number of repetitions. Repetitions where `_run_simulation`
+            raises a `SkipThisOne` exception are not counted.
+        seed : int, optional
+            If provided, the random number generators are re-seeded with
+            it (see :meth:`_reseed`) before running the repetitions.
+
+        Returns
+        -------
+        (SimulationResults, int)
+            The merged results of all repetitions and the number of skipped
+            repetitions.
+        """
+        if seed is not None:
+            obj._reseed(seed)
+        sim_results: Optional[SimulationResults] = None
+        reusable_results: Optional[SimulationResults] = None
+        can_reuse_results = obj._can_reuse_results()
+        num_skipped = 0
+        rep = 0
+        while rep < num_reps:
+            try:
+                # pylint: disable= W0212
+                new_results = obj.__run_simulation_and_track_elapsed_time(
+                    current_params, reusable_results)
+            except SkipThisOne:
+                num_skipped += 1
+                continue
+            if isinstance(new_results, dict):
+                obj._merge_scalar_results(sim_results, new_results)
+            elif sim_results is None:
+                sim_results = new_results
+                if can_reuse_results:
+                    reusable_results = copy.deepcopy(sim_results)
+                    reusable_results.reset_values()
+            else:
+                sim_results.merge_all_results(new_results)
+                if can_reuse_results:
+                    reusable_results = new_results
+                    reusable_results.reset_values()
+            rep += 1
+
+        return cast(SimulationResults, sim_results), num_skipped
+
     def __get_print_variation_iterator(self,
                                        num_variations: int,
                                        start: int = 0) -> Iterator[int]:
@@ -1198,6 +1803,123 @@ class SimulationRunner:
                 print()  # print a new line
                 yield i
 
+    def _get_process_pool_update_progress_function(
+            self, num_variations: int) -> UpdateFunction:
+        """
+        Return a function that should be called to update the
+        progressbar as the simulation of each combination of parameters
+        finishes.
+
+        This method is only called in the '_simulate_with_process_pool'
+        method. It is the equivalent of the
+        _get_serial_update_progress_function method, except that the
+        progressbar counts finished combinations of parameters instead of
+        repetitions and, similarly to simulate_in_parallel, replacements in
+        the progressbar message are performed with the full parameters.
+
+        Parameters
+        ----------
+        num_variations : int
+            The number of combinations of parameters.
+
+        Returns
+        -------
+        func : (int) -> []
+            A function that accepts a single integer argument, the number
+            of finished combinations of parameters, and can be called to
+            update the progressbar.
+        """
+        # By default, the returned function is a dummy function that does
+        # nothing
+        def update_progress_func(_: int) -> None:
+            pass
+
+        if self.update_progress_function_style is None:
+            return update_progress_func
+
+        message = self.progressbar_message.format(**self.params.parameters)
+
+        pbar: Optional[ProgressBarBase] = None
+        if self.update_progress_function_style in ('text1', 'text2'):
+            pbar_class = (ProgressbarText
+                          if self.update_progress_function_style == 'text1'
+                          else ProgressbarText2)
+            # noinspection PyArgumentList
+            pbar = pbar_class(num_variations,
+                              '*',
+                              message,
+                              output=self._get_progress_output_sink('all'),
+                              **self.progressbar_extra_args)
+            pbar.delete_progress_file_after_completion = True
+        elif self.update_progress_function_style == 'ipython':
+            pbar = ProgressBarIPython(num_variations, message)
+        elif callable(self.update_progress_function_style) is True:
+            # pylint: disable=E1102
+            # noinspection PyCallingNonCallable
+            update_progress_func = self.update_progress_function_style(
+                num_variations, self.progressbar_message)
+
+        if pbar is not None:
+            update_progress_func = pbar.progress
+        return update_progress_func
+
+    def _simulate_with_process_pool(
+        self, param_comb_iter: Iterable[SimulationParameters]
+    ) -> List[Tuple[int, SimulationResults, str]]:
+        """
+        Simulate each combination of parameters in `param_comb_iter` in a
+        pool of `self.n_jobs` worker processes.
+
+        Instead of one progressbar for the repetitions of each combination
+        of parameters, a single progressbar is updated (in the current
+        process) as the simulation of each combination finishes.
+
+        Parameters
+        ----------
+        param_comb_iter : iterable[SimulationParameters]
+            The (unpacked) combinations of parameters, usually the
+            iterator returned by `self.params.iter_unpacked_params()`.
+
+        Returns
+        -------
+        list[(int, SimulationResults, str)]
+            For each combination of parameters (in the same order of
+            `param_comb_iter`), the value of `current_rep`, the results as
+            a SimulationResults object, and the name of the file storing
+            partial results.
+        """
+        num_variations = self.params.get_num_unpacked_variations()
+        max_workers = self.n_jobs
+        if max_workers is not None and max_workers < 0:
+            max_workers = None
+
+        update_progress_func = \
+            self._get_process_pool_update_progress_function(num_variations)
+
+        all_results: List[Any] = [None] * num_variations
+        # NOTE: If this fails because of some pickling error, make sure the
+        # class of 'self' (that is, the subclass of SimulationRunner that
+        # you are trying to run) is pickle-able.
+        #
+        # Each combination of parameters re-seeds the random number
+        # generators with its own seed (see _reseed). Otherwise (forked)
+        # workers would replay the same random values.
+        seeds = _spawn_worker_seeds(num_variations)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # Map each future to the index of its parameters combination
+            futures = {
+                executor.submit(
+                    SimulationRunner._simulate_for_current_params_in_pool,
+                    self, current_params, seed): index
+                for index, (current_params, seed) in enumerate(
+                    zip(param_comb_iter, seeds))
+            }
+            for num_finished, future in enumerate(as_completed(futures), 1):
+                all_results[futures[future]] = future.result()
+                update_progress_func(num_finished)
+
+        return all_results
+
     def simulate(self, param_variation_index: Optional[int] = None) -> None:
         """
         Performs the full Monte Carlo simulation (serially).
@@ -1212,6 +1934,11 @@ class SimulationRunner:
         specific code of a single iteration is implemented in the
         _run_simulation method in a subclass.
 
+        If `self.n_jobs` is different from 1, then the different
+        combinations of parameters are simulated in parallel in a pool of
+        worker processes (see the `n_jobs` argument in the class
+        documentation). In that case the object must be pickle-able.
+
         Parameters
         ----------
         param_variation_index : int, optional
@@ -1284,10 +2011,11 @@ class SimulationRunner:
                 err_msg = ('The results filename must be set before'
                            ' calling the "simulate" method.')
                 raise RuntimeError(err_msg)
-            param_comb_list = self.params.get_unpacked_params_list()
-
-            if 0 <= param_variation_index < len(param_comb_list):
-                current_params = param_comb_list[param_variation_index]
+            if 0 <= param_variation_index < num_variations:
+                # Only the combinations up to the desired one are created
+                current_params = next(
+                    itertools.islice(self.params.iter_unpacked_params(),
+                                     param_variation_index, None))
                 self._simulate_for_current_params_serial(
                     current_params, var_print_iter)
 
@@ -1295,18 +2023,34 @@ class SimulationRunner:
         # combinations
         else:
             # xxxxx FOR UNPACKED PARAMETERS xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
-            # Loop through all the parameters combinations
-            for current_params in self.params.get_unpacked_params_list():
-                (current_rep, current_sim_results, _) \
-                    = self._simulate_for_current_params_serial(
-                        current_params, var_print_iter)
-
-                # Store the number of repetitions actually ran for the
-                # current parameters combination
-                self._runned_reps.append(current_rep)
-                # Lets append the simulation results for the current
-                # parameters
-                self.results.append_all_results(current_sim_results)
+            if self.n_jobs != 1 and num_variations > 1:
+                # Simulate the parameters combinations in parallel
+                all_results = self._simulate_with_process_pool(
+                    self.params.iter_unpacked_params())
+                for current_rep, current_sim_results, filename in \
+                        all_results:
+                    self._runned_reps.append(current_rep)
+                    self.results.append_all_results(current_sim_results)
+                    # The partial results were saved in the worker
+                    # processes and thus we need to add their filenames to
+                    # the list of files to be (maybe) deleted here
+                    if filename is not None:
+                        self._results_base_filename_unpack_list.append(
+                            filename)
+            else:
+                # Loop through all the parameters combinations. They are
+                # created one at a time, as they are simulated.
+                for current_params in self.params.iter_unpacked_params():
+                    (current_rep, current_sim_results, _) \
+                        = self._simulate_for_current_params_serial(
+                            current_params, var_print_iter)
+
+                    # Store the number of repetitions actually ran for the
+                    # current parameters combination
+                    self._runned_reps.append(current_rep)
+                    # Lets append the simulation results for the current
+                    # parameters
+                    self.results.append_all_results(current_sim_results)
             # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 
             # Implement the _on_simulate_finish method in a subclass if you
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+"""
+Module with (private) computational kernels used by the Interference
+Alignment algorithms in :mod:`pyphysim.ia.algorithms`.
+
+The kernels operate on the stacked (uniform dimensions) representation of
+the channel and of the precoders, where `H_all_kl` has shape
+`(K, K, Nr, Nt)`, the precoders `F` have shape `(K, Nt, Ns)` and the
+interference subspace bases `C` have shape `(K, Nr, Ni)`. When the users
+have different dimensions the matrices can be zero padded to the largest
+dimensions with :func:`pack_stack`.
+
+For small matrices (a few antennas) the overhead of calling numpy
+functions dominates the actual computation. In that case explicit loops
+compiled with numba are used. If numba is not available, or for larger
+matrices, the numpy (BLAS) implementation is used instead.
+"""
+
+from typing import Sequence
+
+import numpy as np
+
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:  # pragma: no cover
+    HAS_NUMBA = False
+
+__all__ = ['pack_stack', 'compute_cost', 'HAS_NUMBA']
+
+# Matrices with all dimensions smaller than or equal to this value use
+# the numba kernels (when numba is available).
+NUMBA_MAX_DIM = 8
+
+
+def pack_stack(arrays: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    Stack 2D numpy arrays with (possibly) different shapes into a single
+    3D numpy array.
+
+    The arrays are zero padded to the largest number of rows and columns.
+    Because the padding is made of zeros, matrix products and Frobenius
+    norms of the padded matrices are the same as the ones of the original
+    matrices.
+
+    Parameters
+    ----------
+    arrays : list[np.ndarray] | np.ndarray
+        The 2D numpy arrays. This can also be a 1D numpy array of 2D numpy
+        arrays.
+
+    Returns
+    -------
+    np.ndarray
+        A 3D numpy array where `out[i, :nrows_i, :ncols_i]` is equal to
+        `arrays[i]` and the remaining elements are zero.
+
+    Examples
+    --------
+    >>> out = pack_stack([np.ones((2, 1)), 2 * np.ones((1, 3))])
+    >>> out.shape
+    (2, 2, 3)
+    >>> print(out[1])
+    [[2. 2. 2.]
+     [0. 0. 0.]]
+    """
+    nrows = max(A.shape[0] for A in arrays)
+    ncols = max(A.shape[1] for A in arrays)
+    out = np.zeros((len(arrays), nrows, ncols),
+                   dtype=np.result_type(*arrays))
+    for i, A in enumerate(arrays):
+        out[i, :A.shape[0], :A.shape[1]] = A
+    return out
+
+
+# xxxxxxxxxxxxxxx Numpy Implementations xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+def _compute_cost_numpy(H_all_kl: np.ndarray, F: np.ndarray,
+                        C: np.ndarray) -> float:
+    """
+    Numpy implementation of :func:`compute_cost`.
+    """
+    K = H_all_kl.shape[0]
+    Hkl_Fl = np.matmul(H_all_kl, F[np.newaxis])
+    # Only the k != l pairs contribute to the cost
+    Hkl_Fl[np.arange(K), np.arange(K)] = 0.0
+    Ck_H_Hkl_Fl = np.matmul(C.conj().transpose(0, 2, 1)[:, np.newaxis],
+                            Hkl_Fl)
+    cost = (np.vdot(Hkl_Fl, Hkl_Fl).real -
+            np.vdot(Ck_H_Hkl_Fl, Ck_H_Hkl_Fl).real)
+    return float(cost)
+
+
+# xxxxxxxxxxxxxxx Numba Implementations xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+if HAS_NUMBA:
+
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _compute_cost_numba(H_all_kl: np.ndarray, F: np.ndarray,
+                            C: np.ndarray,
+                            X_all: np.ndarray) -> float:  # pragma: no cover
+        """
+        Numba implementation of :func:`compute_cost`.
+
+        `X_all` is a work buffer with shape `(K, Nr, Ns)` whose dtype
+        is the one of the products of the channel and the precoders.
+        """
+        K, _, Nr, Nt = H_all_kl.shape
+        Ns = F.shape[2]
+        Ni = C.shape[2]
+        cost_k = np.zeros(K)
+        for k in numba.prange(K):
+            X = X_all[k]
+            acc = 0.0
+            for l in range(K):
+                if l == k:
+                    continue
+                # X = H_{k,l} F_l
+                for i in range(Nr):
+                    for j in range(Ns):
+                        s = 0j
+                        for t in range(Nt):
+                            s += H_all_kl[k, l, i, t] * F[l, t, j]
+                        X[i, j] = s
+                        acc += s.real * s.real + s.imag * s.imag
+                # Subtract the energy of C_k^H X
+                for a in range(Ni):
+                    for j in range(Ns):
+                        s = 0j
+                        for i in range(Nr):
+                            s += C[k, i, a].conjugate() * X[i, j]
+                        acc -= s.real * s.real + s.imag * s.imag
+            cost_k[k] = acc
+        return cost_k.sum()
+
+
+def _use_numba(*dims: int) -> bool:
+    """
+    Check if the numba kernels should be used for matrices with the
+    provided dimensions.
+    """
+    return HAS_NUMBA and max(dims) <= NUMBA_MAX_DIM
+
+
+# xxxxxxxxxxxxxxx Public Kernels xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+def compute_cost(H_all_kl: np.ndarray, F: np.ndarray, C: np.ndarray) -> float:
+    """
+    Compute the cost of the Alternating Minimization algorithm.
+
+    The cost is given by
+
+        :math:`\\sum_k \\sum_{l \\neq k} \\|(\\mtI - \\mtC_k \\mtC_k^H) \\mtH_{k,l} \\mtF_l\\|_F^2`,
+
+    but since the columns of :math:`\\mtC_k` are orthonormal it is
+    computed as :math:`\\|\\mtX\\|_F^2 - \\|\\mtC_k^H \\mtX\\|_F^2`, where
+    :math:`\\mtX = \\mtH_{k,l} \\mtF_l`, without forming the projection
+    matrices.
+
+    Parameters
+    ----------
+    H_all_kl : np.ndarray
+        The channel of all pairs of users, with shape `(K, K, Nr, Nt)`.
+    F : np.ndarray
+        The precoders of all users, with shape `(K, Nt, Ns)`.
+    C : np.ndarray
+        The interference subspace basis of all users, with shape
+        `(K, Nr, Ni)`.
+
+    Returns
+    -------
+    float
+        The cost. Note that due to numerical errors it can be very
+        slightly negative when the interference is perfectly aligned.
+    """
+    if _use_numba(*H_all_kl.shape[2:], F.shape[2]):
+        X_all = np.empty((H_all_kl.shape[0], H_all_kl.shape[2], F.shape[2]),
+                         dtype=np.result_type(H_all_kl, F))
+        return float(_compute_cost_numba(H_all_kl, F, C, X_all))
+    return _compute_cost_numpy(H_all_kl, F, C)
@@ -9,11 +9,16 @@ from typing import Any, Dict, List, Optional, Tuple, TypeVar, Union, cast
 
 import numba
 import numpy as np
+from scipy.linalg import get_blas_funcs
 from scipy.special import erfc
 
 IntOrIntArray = TypeVar("IntOrIntArray", np.ndarray, int)
 NumberOrArrayUnion = Union[np.ndarray, float]
 
+# Matrices with fewer rows than this use np.matmul instead of the BLAS
+# herk routine in `batched_herk`
+_HERK_MIN_DIM = 32
+
 
 def gmd(U: np.ndarray,
         S: np.ndarray,
@@ -324,7 +329,7 @@ def xor(a: int, b: int) -> int:
     return a.__xor__(b)
 
 
-def randn_c(*args: int) -> np.ndarray:
+def randn_c(*args: int, dtype: Any = complex) -> np.ndarray:
     """
     Generates a random circularly complex gaussian matrix.
 
@@ -334,6 +339,10 @@ def randn_c(*args: int) -> np.ndarray:
         Variable number of arguments (int values) specifying the
         dimensions of the returned array. This is directly passed to the
         numpy.random.randn function.
+    dtype : np.dtype, optional
+        The complex dtype of the returned array. The default is
+        `complex` (complex128), but `np.complex64` can be used to halve
+        the memory and bandwidth of the subsequent computations.
 
     Returns
     -------
@@ -348,15 +357,16 @@ def randn_c(*args: int) -> np.ndarray:
     (4, 3)
     >>> a.dtype
     dtype('complex128')
+    >>> randn_c(4, 3, dtype=np.complex64).dtype
+    dtype('complex64')
 
     """
-    # noinspection PyArgumentList
-    return (1.0 / math.sqrt(2.0)) * (np.random.randn(*args) +
-                                     (1j * np.random.randn(*args)))
+    return _randn_c_impl(np.random.standard_normal, args, dtype)
 
 
 def randn_c_RS(RS: np.random.RandomState,
-               *args: int) -> np.ndarray:  # pragma: no cover
+               *args: int,
+               dtype: Any = complex) -> np.ndarray:  # pragma: no cover
     """
     Generates a random circularly complex gaussian matrix.
 
@@ -373,6 +383,9 @@ def randn_c_RS(RS: np.random.RandomState,
         Variable number of arguments specifying the dimensions of the
         returned array. This is directly passed to the
         numpy.random.randn function.
+    dtype : np.dtype, optional
+        The complex dtype of the returned array. The default is
+        `complex` (complex128).
 
     Returns
     -------
@@ -383,10 +396,45 @@ def randn_c_RS(RS: np.random.RandomState,
     """
     if RS is None:
         # noinspection PyArgumentList
-        return randn_c(*args)
+        return randn_c(*args, dtype=dtype)
+
+    return _randn_c_impl(RS.standard_normal, args, dtype)
+
+
+def _randn_c_impl(standard_normal: Any, shape: Tuple[int, ...],
+                  dtype: Any) -> np.ndarray:
+    """
+    Implementation of the randn_c and randn_c_RS functions.
 
-    # noinspection PyArgumentList
-    return (1.0 / math.sqrt(2.0)) * (RS.randn(*args) + (1j * RS.randn(*args)))
+    The real and imaginary parts are obtained from a single draw of
+    normal samples, where the last dimension has size 2, which is then
+    reinterpreted as a complex array without copying.
+
+    Parameters
+    ----------
+    standard_normal : callable
+        Function that returns standard normal samples with the provided
+        `size`, such as `np.random.standard_normal`.
+    shape : tuple[int]
+        The shape of the returned array.
+    dtype : np.dtype
+        The complex dtype of the returned array.
+
+    Returns
+    -------
+    result : np.ndarray
+        The complex gaussian samples, or a scalar if `shape` is empty.
+    """
+    dtype = np.dtype(dtype)
+    real_dtype = np.empty(0, dtype=dtype).real.dtype
+    samples = standard_normal(size=tuple(shape) + (2, ))
+    result = samples.astype(real_dtype, copy=False).view(dtype)
+    result = result.reshape(shape)
+    result *= 1.0 / math.sqrt(2.0)
+    if result.ndim == 0:
+        # No dimensions were provided and we return a scalar
+        return result[()]
+    return result
 
 
 def level2bits(n: int) -> int:
@@ -804,6 +852,50 @@ def update_inv_sum_diag(invA: np.ndarray, diagonal: np.ndarray) -> np.ndarray:
     return new_inv
 
 
+def batched_herk(A: np.ndarray) -> np.ndarray:
+    """
+    Calculates the Hermitian product :math:`\\mtA \\mtA^H` for a matrix
+    `A` or for each matrix in a stack of matrices.
+
+    For large matrices the BLAS `herk` routine (`syrk` for real matrices)
+    is used. It only computes one triangle of the result, which is about
+    half of the flops of a general matrix product. For small matrices the
+    overhead of calling `herk` for each matrix in the stack is larger than
+    the savings and `np.matmul` is used instead.
+
+    Parameters
+    ----------
+    A : np.ndarray
+        A 2D numpy array with shape `(N, M)`, or a numpy array with more
+        dimensions, where the last two dimensions correspond to the
+        matrices.
+
+    Returns
+    -------
+    np.ndarray
+        A numpy array with shape `(..., N, N)`.
+
+    Examples
+    --------
+    >>> A = np.array([[1, 2j], [0, 1]])
+    >>> print(batched_herk(A))
+    [[5.+0.j 0.+2.j]
+     [0.-2.j 1.+0.j]]
+    """
+    N, M = A.shape[-2:]
+    if N < _HERK_MIN_DIM:
+        return np.matmul(A, np.swapaxes(A, -1, -2).conj())
+
+    herk = get_blas_funcs('herk' if np.iscomplexobj(A) else 'syrk', (A, ))
+    slabs = A.reshape(-1, N, M)
+    out = np.empty((slabs.shape[0], N, N), dtype=herk.dtype)
+    for i, Ai in enumerate(slabs):
+        # Only the upper triangle of the output of herk is computed
+        upper = herk(1.0, Ai)
+        out[i] = np.triu(upper) + np.triu(upper, 1).T.conj()
+    return out.reshape(A.shape[:-2] + (N, N))
+
+
 def calc_confidence_interval(mean: float,
                              std: float,
                              n: int,
@@ -110,6 +110,37 @@ def json_numpy_or_set_obj_hook(
     return dct
 
 
+def get_object_state(obj: Any) -> Dict[str, Any]:
+    """
+    Get the state of an object whose class (or any of its base classes)
+    uses `__slots__`, such as to implement `__getstate__` for pickling.
+
+    The slots of all classes in the MRO of `obj` are included (unless they
+    were not set), as well as the `__dict__` of `obj` if it has one (e.g.
+    for a subclass that does not define `__slots__`).
+
+    Parameters
+    ----------
+    obj : any
+        The object.
+
+    Returns
+    -------
+    dict
+        Dictionary with the value of each attribute.
+    """
+    state: Dict[str, Any] = {}
+    for cls in type(obj).__mro__:
+        slots = cls.__dict__.get('__slots__', ())
+        if isinstance(slots, str):
+            slots = (slots, )
+        for name in slots:
+            if name not in ('__dict__', '__weakref__') and hasattr(obj, name):
+                state[name] = getattr(obj, name)
+    state.update(getattr(obj, '__dict__', {}))
+    return state
+
+
 class JsonSerializable:
     """
     Base class for classes you want to be JSON serializable (convert
@@ -120,6 +151,9 @@ class JsonSerializable:
 
     Note that a subclass must implement the `_to_dict` and `_from_dict` methods.
     """
+    # Empty __slots__ so that subclasses can also use __slots__
+    __slots__ = ()
+
     def _to_dict(self) -> Dict[str, Any]:
         """
         Convert the object to a dictionary representation.
@@ -208,7 +242,7 @@ class JsonSerializable:
 
 # xxxxxxxxxx Test and Example Usage xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 if __name__ == '__main__':
-    expected = np.arange(100, dtype=np.float)
+    expected = np.arange(100, dtype=float)
     dumped = json.dumps(expected, cls=NumpyOrSetEncoder)
     result = json.loads(dumped, object_hook=json_numpy_or_set_obj_hook)
     print(type(result))
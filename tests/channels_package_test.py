@@ -3314,6 +3314,12 @@ class MultiUserChannelMatrixTestCase(unittest.TestCase):
             for tx in np.arange(K):
                 self.assertEqual(self.multiH.H[rx, tx].shape, (Nr, Nt))
 
+        # Test the dtype of the channel
+        self.assertEqual(self.multiH.big_H.dtype, np.complex128)
+        self.multiH.randomize(Nr, Nt, K, dtype=np.complex64)
+        self.assertEqual(self.multiH.big_H.dtype, np.complex64)
+        self.assertEqual(self.multiH.get_Hkl(0, 1).dtype, np.complex64)
+
     def test_init_from_channel_matrix(self):
         H = self.H
         K = self.K
@@ -3470,6 +3476,36 @@ class MultiUserChannelMatrixTestCase(unittest.TestCase):
                     self.multiH.big_H[cumNr[row]:cumNr[row + 1],
                                       cumNt[col]:cumNt[col + 1]])
 
+    def test_get_all_Hkl(self):
+        # Non uniform number of antennas -> the channels cannot be stacked
+        self.multiH.init_from_channel_matrix(self.H, self.Nr, self.Nt, self.K)
+        self.assertIsNone(self.multiH.get_all_Hkl())
+
+        K = 3
+        Nr = 2
+        Nt = 3
+        self.multiH.randomize(Nr, Nt, K)
+        H_all_kl = self.multiH.get_all_Hkl()
+        self.assertEqual(H_all_kl.shape, (K, K, Nr, Nt))
+        for k in range(K):
+            for l in range(K):
+                np.testing.assert_array_equal(H_all_kl[k, l],
+                                              self.multiH.get_Hkl(k, l))
+
+        # The stacked channel must also account the pathloss
+        pathloss = np.abs(np.random.randn(K, K))
+        self.multiH.set_pathloss(pathloss)
+        H_all_kl = self.multiH.get_all_Hkl()
+        for k in range(K):
+            for l in range(K):
+                np.testing.assert_array_almost_equal(
+                    H_all_kl[k, l], self.multiH.get_Hkl(k, l))
+
+        # A new channel must invalidate the stacked channel
+        self.multiH.randomize(Nr, Nt, K)
+        np.testing.assert_array_equal(self.multiH.get_all_Hkl()[0, 1],
+                                      self.multiH.get_Hkl(0, 1))
+
     def test_corrupt_data(self):
         NSymbs = 20
         # Create some input data for the 3 users
@@ -3711,6 +3747,38 @@ class MultiUserChannelMatrixTestCase(unittest.TestCase):
             Qk, expected_Q2 + noise_var * np.eye(2))
         # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 
+    def test_calc_Q_all_k(self):
+        K = 3
+        Nt = 2
+        Nr = 3
+        Ns = 2
+        P = np.array([1.2, 1.5, 0.9])
+
+        F_all_k = np.empty(K, dtype=np.ndarray)
+        for k in range(K):
+            F_all_k[k] = randn_c(Nt, Ns)
+            F_all_k[k] = (F_all_k[k] / np.linalg.norm(F_all_k[k], 'fro') *
+                          np.sqrt(P[k]))
+
+        # The number of antennas must be the same for all users
+        self.multiH.randomize(np.array([2, 3, 3]), Nt, K)
+        with self.assertRaises(ValueError):
+            self.multiH.calc_Q_all_k(F_all_k)
+
+        self.multiH.randomize(Nr, Nt, K)
+        Q_all_k = self.multiH.calc_Q_all_k(F_all_k)
+        self.assertEqual(Q_all_k.shape, (K, Nr, Nr))
+        for k in range(K):
+            np.testing.assert_array_almost_equal(
+                Q_all_k[k], self.multiH.calc_Q(k, F_all_k))
+
+        # Now with noise variance different of 0
+        self.multiH.noise_var = round(0.1 * np.random.random_sample(), 4)
+        Q_all_k = self.multiH.calc_Q_all_k(F_all_k)
+        for k in range(K):
+            np.testing.assert_array_almost_equal(
+                Q_all_k[k], self.multiH.calc_Q(k, F_all_k))
+
     def test_calc_JP_Q(self):
         K = 3
         Nt = np.array([2, 2, 2])
@@ -4619,6 +4687,27 @@ class MultiUserChannelMatrixExtIntTestCase(unittest.TestCase):
         self.assertIsNone(self.multiH.pathloss)
         self.assertIsNone(self.multiH._pathloss_big_matrix)
 
+    def test_get_all_Hkl(self):
+        self.multiH.randomize(2, 3, self.K, self.NtE)
+        H_all_kl = self.multiH.get_all_Hkl()
+
+        # The channels from the external interference sources are not
+        # included
+        self.assertEqual(H_all_kl.shape, (self.K, self.K, 2, 3))
+        for k in range(self.K):
+            for l in range(self.K):
+                np.testing.assert_array_equal(H_all_kl[k, l],
+                                              self.multiH.get_Hkl(k, l))
+
+        pathloss = np.abs(np.random.randn(self.K, self.K))
+        pathloss_extint = np.abs(np.random.randn(self.K, 2))
+        self.multiH.set_pathloss(pathloss, pathloss_extint)
+        H_all_kl = self.multiH.get_all_Hkl()
+        for k in range(self.K):
+            for l in range(self.K):
+                np.testing.assert_array_almost_equal(
+                    H_all_kl[k, l], self.multiH.get_Hkl(k, l))
+
     def test_get_H_property(self):
         # test the get_H property when there is pathloss
         self.multiH.randomize(self.Nr, self.Nt, self.K, self.NtE)
@@ -5010,6 +5099,34 @@ class MultiUserChannelMatrixExtIntTestCase(unittest.TestCase):
         np.testing.assert_array_almost_equal(Qk, expected_Q2)
         # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 
+    def test_calc_Q_all_k(self):
+        K = 3
+        Nt = 2
+        Nr = 3
+        Ns = 1
+        NtE = np.array([1, 2])
+        P = np.array([1.2, 1.5, 0.9])
+
+        self.multiH.randomize(Nr, Nt, K, NtE)
+        self.multiH.noise_var = round(0.1 * np.random.random_sample(), 4)
+
+        F_all_k = np.empty(K, dtype=np.ndarray)
+        for k in range(K):
+            F_all_k[k] = randn_c(Nt, Ns)
+            F_all_k[k] = (F_all_k[k] / np.linalg.norm(F_all_k[k], 'fro') *
+                          np.sqrt(P[k]))
+
+        Q_all_k = self.multiH.calc_Q_all_k(F_all_k)
+        self.assertEqual(Q_all_k.shape, (K, Nr, Nr))
+        for k in range(K):
+            np.testing.assert_array_almost_equal(
+                Q_all_k[k], self.multiH.calc_Q(k, F_all_k))
+
+        Q_all_k = self.multiH.calc_Q_all_k(F_all_k, pe=0.5)
+        for k in range(K):
+            np.testing.assert_array_almost_equal(
+                Q_all_k[k], self.multiH.calc_Q(k, F_all_k, pe=0.5))
+
     def test_calc_JP_Q(self):
         K = 3
         Nt = np.array([2, 2, 2])
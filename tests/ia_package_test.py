@@ -13,14 +13,18 @@ try:
 except ImportError as e:  # pragma: no cover
     import pickle  # type: ignore
 
+import copy
 import doctest
+import itertools
 import unittest
+from unittest import mock
 
 import numpy as np
 from numpy.linalg import norm
 
 import pyphysim.ia  # Import the package ia
 from pyphysim import channels
+from pyphysim.ia import algorithms
 from pyphysim.ia.algorithms import (AlternatingMinIASolver,
                                     BruteForceStreamIASolver,
                                     ClosedFormIASolver, GreedStreamIASolver,
@@ -1333,8 +1337,13 @@ class AlternatingMinIASolverTestCase(CustomTestCase):
                               H02_F2.transpose().conjugate()))
         expected_C0 = peig(expected_C0, Ni[k])[0]
 
-        # Test if C[0] is equal to the expected output
-        np.testing.assert_array_almost_equal(self.iasolver._C[0], expected_C0)
+        # Test if C[0] is equal to the expected output. The eigenvectors
+        # are only unique up to a phase. Therefore, we compare the
+        # projection matrices into the subspaces.
+        C0 = self.iasolver._C[0]
+        np.testing.assert_array_almost_equal(
+            np.dot(C0, C0.conj().T),
+            np.dot(expected_C0, expected_C0.conj().T))
         # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 
         # xxxxx Calculate the expected C[1] after one step xxxxxxxxxxxxxxxx
@@ -1350,7 +1359,10 @@ class AlternatingMinIASolverTestCase(CustomTestCase):
         expected_C1 = peig(expected_C1, Ni[k])[0]
 
         # Test if C[1] is equal to the expected output
-        np.testing.assert_array_almost_equal(self.iasolver._C[1], expected_C1)
+        C1 = self.iasolver._C[1]
+        np.testing.assert_array_almost_equal(
+            np.dot(C1, C1.conj().T),
+            np.dot(expected_C1, expected_C1.conj().T))
         # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 
         # xxxxx Calculate the expected C[2] after one step xxxxxxxxxxxxxxxx
@@ -1366,9 +1378,31 @@ class AlternatingMinIASolverTestCase(CustomTestCase):
         expected_C2 = peig(expected_C2, Ni[k])[0]
 
         # Test if C[2] is equal to the expected output
-        np.testing.assert_array_almost_equal(self.iasolver._C[2], expected_C2)
+        C2 = self.iasolver._C[2]
+        np.testing.assert_array_almost_equal(
+            np.dot(C2, C2.conj().T),
+            np.dot(expected_C2, expected_C2.conj().T))
         # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 
+    def test_updateC_uniform_dimensions(self):
+        # When all users have the same dimensions the C matrices of all
+        # users are calculated at once
+        multiUserChannel = self.iasolver._multiUserChannel
+        multiUserChannel.randomize(4, 4, self.K)
+        Ns = 2
+        self.iasolver.randomizeF(Ns, self.P)
+        self.iasolver._updateC()
+
+        for k in range(self.K):
+            expected_Ck = peig(self.iasolver.calc_Q(k), 4 - Ns)[0]
+            Ck = self.iasolver._C[k]
+            self.assertEqual(Ck.shape, (4, 4 - Ns))
+            # The eigenvectors are only unique up to a phase. Therefore, we
+            # compare the projection matrices into the subspaces.
+            np.testing.assert_array_almost_equal(
+                np.dot(Ck, Ck.conj().T),
+                np.dot(expected_Ck, expected_Ck.conj().T))
+
     def test_updateF(self):
         self.iasolver.randomizeF(self.Ns, self.P)
         self.iasolver._updateC()
@@ -1430,15 +1464,21 @@ class AlternatingMinIASolverTestCase(CustomTestCase):
         # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 
         # xxxxxxxxxx Finally perform the tests xxxxxxxxxxxxxxxxxxxxxxxxxxxx
-        np.testing.assert_array_almost_equal(F0, expected_F0)
-        np.testing.assert_array_almost_equal(F1, expected_F1)
-        np.testing.assert_array_almost_equal(F2, expected_F2)
-        np.testing.assert_array_almost_equal(full_F0,
-                                             expected_F0 * np.sqrt(self.P[0]))
-        np.testing.assert_array_almost_equal(full_F1,
-                                             expected_F1 * np.sqrt(self.P[1]))
-        np.testing.assert_array_almost_equal(full_F2,
-                                             expected_F2 * np.sqrt(self.P[2]))
+        # The eigenvectors are only unique up to a phase (and up to a
+        # rotation for repeated eigenvalues, such as the two dimensional
+        # null space of the matrix used to calculate F2). Therefore, we
+        # compare the projection matrices into the subspaces. Note that
+        # the basis obtained with `leig` for a repeated eigenvalue is not
+        # necessarily orthogonal and thus we orthonormalize it first.
+        for Fl, full_Fl, expected_Fl, Ns, Pl in zip(
+                [F0, F1, F2], [full_F0, full_F1, full_F2],
+                [expected_F0, expected_F1, expected_F2], self.Ns, self.P):
+            Q = np.linalg.qr(expected_Fl)[0]
+            expected_proj = np.dot(Q, Q.conj().T) / Ns
+            np.testing.assert_array_almost_equal(np.dot(Fl, Fl.conj().T),
+                                                 expected_proj)
+            np.testing.assert_array_almost_equal(
+                np.dot(full_Fl, full_Fl.conj().T), Pl * expected_proj)
         # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 
         # xxxxxxxxxx Test the norm of the precoders xxxxxxxxxxxxxxxxxxxxxxx
@@ -1450,6 +1490,150 @@ class AlternatingMinIASolverTestCase(CustomTestCase):
         self.assertAlmostEqual(np.linalg.norm(full_F2, 'fro')**2, self.P[2])
         # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 
+    def test_updateF_uniform_dimensions(self):
+        # When all users have the same dimensions the precoders of all
+        # users are calculated at once
+        multiUserChannel = self.iasolver._multiUserChannel
+        multiUserChannel.randomize(4, 4, self.K)
+        Ns = 2
+        self.iasolver.randomizeF(Ns, self.P)
+        self.iasolver._updateC()
+        self.iasolver._updateF()
+
+        for l in range(self.K):
+            expected_Fl = 0.0
+            for k in set(range(self.K)) - {l}:
+                Hkl = self.iasolver._get_channel(k, l)
+                Ck = self.iasolver._C[k]
+                Yk = np.eye(4) - np.dot(Ck, Ck.conj().T)
+                expected_Fl = expected_Fl + np.dot(
+                    np.dot(Hkl.conj().T, Yk), Hkl)
+            expected_Fl = leig(expected_Fl, Ns)[0]
+            expected_Fl /= np.linalg.norm(expected_Fl, 'fro')
+
+            Fl = self.iasolver.F[l]
+            self.assertEqual(Fl.shape, (4, Ns))
+            self.assertAlmostEqual(np.linalg.norm(Fl, 'fro'), 1.0)
+            # The eigenvectors are only unique up to a phase
+            np.testing.assert_array_almost_equal(
+                np.dot(Fl, Fl.conj().T),
+                np.dot(expected_Fl, expected_Fl.conj().T))
+            np.testing.assert_array_almost_equal(
+                self.iasolver.full_F[l], Fl * np.sqrt(self.P[l]))
+
+        # The work buffers are reused in the next iterations, but the
+        # precoders must not share memory with them
+        buffers = dict(self.iasolver._scratch)
+        F = self.iasolver.F
+        self.iasolver._updateC()
+        self.iasolver._updateF()
+        for name, buffer in buffers.items():
+            self.assertIs(self.iasolver._scratch[name], buffer)
+            for Fl in F:
+                self.assertFalse(np.shares_memory(Fl, buffer))
+
+    def test_updateC_and_updateF_with_truncated_eigh(self):
+        # With many antennas and only a few required eigenvectors a
+        # truncated eigen-solver is used
+        multiUserChannel = self.iasolver._multiUserChannel
+        multiUserChannel.randomize(20, 20, self.K)
+
+        # Only 5 dimensions in the interference subspace -> truncated
+        # solver used in _updateC
+        Ns = 15
+        self.iasolver.randomizeF(Ns, self.P)
+        self.iasolver._updateC()
+        for k in range(self.K):
+            expected_Ck = peig(self.iasolver.calc_Q(k), 20 - Ns)[0]
+            Ck = self.iasolver._C[k]
+            self.assertEqual(Ck.shape, (20, 20 - Ns))
+            np.testing.assert_array_almost_equal(
+                np.dot(Ck, Ck.conj().T),
+                np.dot(expected_Ck, expected_Ck.conj().T))
+
+        # Only 5 streams -> truncated solver used in _updateF. Note that we
+        # use more users here so that the matrix whose eigenvectors are
+        # calculated in _updateF is full rank (and thus the subspace of the
+        # least dominant eigenvectors is unique).
+        K = 5
+        multiUserChannel.randomize(20, 20, K)
+        Ns = 5
+        self.iasolver.randomizeF(Ns)
+        self.iasolver._updateC()
+        self.iasolver._updateF()
+        for l in range(K):
+            expected_Fl = 0.0
+            for k in set(range(K)) - {l}:
+                Hkl = self.iasolver._get_channel(k, l)
+                Ck = self.iasolver._C[k]
+                Yk = np.eye(20) - np.dot(Ck, Ck.conj().T)
+                expected_Fl = expected_Fl + np.dot(
+                    np.dot(Hkl.conj().T, Yk), Hkl)
+            expected_Fl = leig(expected_Fl, Ns)[0]
+            expected_Fl /= np.linalg.norm(expected_Fl, 'fro')
+            Fl = self.iasolver.F[l]
+            self.assertEqual(Fl.shape, (20, Ns))
+            np.testing.assert_array_almost_equal(
+                np.dot(Fl, Fl.conj().T),
+                np.dot(expected_Fl, expected_Fl.conj().T))
+
+    def test_updateC_and_updateF_with_thread_pool(self):
+        # With many users (with different dimensions) the per user
+        # computations are performed in a thread pool. The result must be
+        # the same as when they are performed sequentially.
+        K = 8
+        Nr = np.array([4, 5, 4, 5, 4, 5, 4, 5])
+        Nt = np.array([5, 4, 5, 4, 5, 4, 5, 4])
+        Ns = np.array([2, 1, 2, 1, 2, 1, 2, 1])
+        self.iasolver._multiUserChannel.randomize(Nr, Nt, K)
+        self.iasolver.randomizeF(Ns)
+        F = self.iasolver.F
+
+        min_users = algorithms._THREAD_POOL_MIN_USERS
+        try:
+            all_C = []
+            all_F = []
+            for algorithms._THREAD_POOL_MIN_USERS in [K + 1, 1]:
+                self.iasolver.set_precoders(F=F)
+                self.iasolver._updateC()
+                self.iasolver._updateF()
+                all_C.append(self.iasolver._C)
+                all_F.append(self.iasolver.F)
+
+            # The same thread pool is reused in all iterations and it is
+            # shut down when the solve method finishes
+            with mock.patch.object(algorithms.os, 'cpu_count',
+                                   return_value=2):
+                self.iasolver._step()
+                executor = self.iasolver._executor
+                self.assertIsNotNone(executor)
+                self.iasolver._step()
+                self.assertIs(self.iasolver._executor, executor)
+
+                # The thread pool is neither pickled nor copied
+                iasolver2 = pickle.loads(pickle.dumps(self.iasolver))
+                self.assertIsNone(iasolver2._executor)
+                self.assertIsNone(copy.copy(self.iasolver)._executor)
+                self.assertIs(self.iasolver._executor, executor)
+
+                # The thread pool is shut down even if solve fails
+                with mock.patch.object(self.iasolver,
+                                       '_step',
+                                       side_effect=RuntimeError):
+                    with self.assertRaises(RuntimeError):
+                        self.iasolver.solve(Ns)
+                self.assertIsNone(self.iasolver._executor)
+
+                self.iasolver.max_iterations = 2
+                self.iasolver.solve(Ns)
+                self.assertIsNone(self.iasolver._executor)
+        finally:
+            algorithms._THREAD_POOL_MIN_USERS = min_users
+
+        for k in range(K):
+            np.testing.assert_array_almost_equal(all_C[0][k], all_C[1][k])
+            np.testing.assert_array_almost_equal(all_F[0][k], all_F[1][k])
+
     def test_updateW(self):
         # Initialize with some random precoders and then call _updateC()
         # and _updateW()
@@ -1516,6 +1700,62 @@ class AlternatingMinIASolverTestCase(CustomTestCase):
                                                  self.iasolver.W_H[k])
             # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 
+    def test_updateW_uniform_dimensions(self):
+        multiUserChannel = self.iasolver._multiUserChannel
+        multiUserChannel.randomize(4, 4, self.K)
+        Ns = 2
+        self.iasolver._solve_init(Ns, self.P)
+        self.iasolver._step()
+        self.iasolver._updateW()
+
+        for k in range(self.K):
+            tildeHk = np.dot(self.iasolver._get_channel(k, k),
+                             self.iasolver.F[k])
+            tildeHk = np.hstack([tildeHk, self.iasolver._C[k]])
+            expected_Wk_H = np.linalg.inv(tildeHk)[0:Ns]
+            np.testing.assert_array_almost_equal(self.iasolver.W_H[k],
+                                                 expected_Wk_H)
+
+    def test_solve_with_complex64_channel(self):
+        multiUserChannel = self.iasolver._multiUserChannel
+        multiUserChannel.randomize(4, 4, self.K, dtype=np.complex64)
+        self.iasolver.max_iterations = 20
+        self.iasolver.solve(Ns=2, P=self.P)
+
+        # All the computations must be performed in single precision
+        self.assertEqual(self.iasolver._C.dtype, np.complex64)
+        for k in range(self.K):
+            self.assertEqual(self.iasolver.F[k].dtype, np.complex64)
+            self.assertEqual(self.iasolver.full_F[k].dtype, np.complex64)
+            self.assertEqual(self.iasolver.W_H[k].dtype, np.complex64)
+            np.testing.assert_array_almost_equal(
+                np.dot(self.iasolver.full_W_H[k],
+                       np.dot(self.iasolver._get_channel(k, k),
+                              self.iasolver.full_F[k])),
+                np.eye(2),
+                decimal=4)
+
+        # Now with different dimensions for each user, which does not use
+        # the stacked implementation
+        Nr = np.array([4, 5, 4])
+        Nt = np.array([4, 4, 5])
+        Ns = np.array([2, 3, 2])
+        multiUserChannel.randomize(Nr, Nt, self.K, dtype=np.complex64)
+        self.iasolver.clear()
+        self.iasolver.solve(Ns=Ns, P=self.P)
+
+        for k in range(self.K):
+            self.assertEqual(self.iasolver._C[k].dtype, np.complex64)
+            self.assertEqual(self.iasolver.F[k].dtype, np.complex64)
+            self.assertEqual(self.iasolver.full_F[k].dtype, np.complex64)
+            self.assertEqual(self.iasolver.W_H[k].dtype, np.complex64)
+            np.testing.assert_array_almost_equal(
+                np.dot(self.iasolver.full_W_H[k],
+                       np.dot(self.iasolver._get_channel(k, k),
+                              self.iasolver.full_F[k])),
+                np.eye(Ns[k]),
+                decimal=4)
+
     def test_getCost(self):
         P = np.array([1.23, 0.965])
         K = 2
@@ -1550,6 +1790,20 @@ class AlternatingMinIASolverTestCase(CustomTestCase):
 
         self.assertAlmostEqual(self.iasolver.get_cost(), Cost)
 
+        # Now test with users having different dimensions
+        multiUserChannel.randomize(self.Nr, self.Nt, self.K)
+        self.iasolver._solve_init(self.Ns, self.P)
+        self.iasolver._step()
+
+        Cost = 0
+        for k, l in itertools.permutations(range(self.K), 2):
+            Hkl_Fl = np.dot(self.iasolver._get_channel(k, l),
+                            self.iasolver.full_F[l])
+            Ck = self.iasolver._C[k]
+            Cost += norm(Hkl_Fl - np.dot(np.dot(Ck, Ck.conj().T), Hkl_Fl),
+                         'fro')**2
+        self.assertAlmostEqual(self.iasolver.get_cost(), Cost)
+
     def test_solve(self):
         Nr = 2
         Nt = 2
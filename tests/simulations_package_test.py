@@ -12,12 +12,13 @@ import doctest
 import glob
 import json
 import os
+import pickle
 import sys
 import unittest
 from copy import copy
 from io import StringIO
 from itertools import repeat
-from time import sleep
+from time import sleep, time
 
 import numpy as np
 
@@ -453,6 +454,12 @@ class ParametersModuleFunctionsTestCase(unittest.TestCase):
 # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 
 
+# Subclass of SimulationParameters with extra attributes, used to test
+# pickling
+class _SimulationParametersWithDict(SimulationParameters):
+    pass
+
+
 class SimulationParametersTestCase(unittest.TestCase):
     """
     Unit-tests for the SimulationParameters class in the parameters module.
@@ -467,6 +474,16 @@ class SimulationParametersTestCase(unittest.TestCase):
         self.assertEqual(self.sim_params['first'], 10)
         self.assertEqual(self.sim_params['second'], 20)
 
+        # The dictionary is copied, but not the parameter values
+        params_dict = {'first': 10, 'second': np.array([1, 2])}
+        sim_params = SimulationParameters.create(params_dict)
+        sim_params_deep = SimulationParameters.create_deep(params_dict)
+        params_dict['third'] = 30
+        self.assertEqual(len(sim_params), 2)
+        self.assertIs(sim_params['second'], params_dict['second'])
+        self.assertEqual(sim_params_deep, sim_params)
+        self.assertIsNot(sim_params_deep['second'], params_dict['second'])
+
     def test_add(self):
         self.sim_params.add('third', np.array([1, 3, 2, 5]))
         self.assertEqual(len(self.sim_params), 3)
@@ -639,6 +656,84 @@ class SimulationParametersTestCase(unittest.TestCase):
             self.assertTrue(
                 unpacked_param_list[i]._original_sim_params is self.sim_params)
 
+    def test_get_unpacked_params_list_cache(self):
+        self.sim_params.add('third', np.array([1, 3, 2, 5]))
+        self.sim_params.set_unpack_parameter('third')
+
+        unpacked_list = self.sim_params.get_unpacked_params_list(
+            use_cache=True)
+        unpacked_list2 = self.sim_params.get_unpacked_params_list(
+            use_cache=True)
+        # Only the combinations are cached. New SimulationParameters
+        # objects are created in each call.
+        self.assertEqual(unpacked_list, unpacked_list2)
+        for p1, p2 in zip(unpacked_list, unpacked_list2):
+            self.assertIsNot(p1, p2)
+        self.assertEqual(unpacked_list,
+                         self.sim_params.get_unpacked_params_list())
+
+        # Changing a returned object does not change the next results
+        unpacked_list[0].parameters['first'] = 99
+        self.assertEqual(
+            self.sim_params.get_unpacked_params_list(
+                use_cache=True)[0]['first'], self.sim_params['first'])
+
+        # The cache is invalidated when the parameters change
+        self.sim_params.add('fourth', ['A', 'B'])
+        self.sim_params.set_unpack_parameter('fourth')
+        self.assertEqual(
+            len(self.sim_params.get_unpacked_params_list(use_cache=True)), 8)
+        self.sim_params.set_unpack_parameter('fourth', False)
+        self.assertEqual(
+            len(self.sim_params.get_unpacked_params_list(use_cache=True)), 4)
+        self.sim_params.add('third', [1, 2])
+        self.assertEqual(
+            len(self.sim_params.get_unpacked_params_list(use_cache=True)), 2)
+
+        # This includes changing the values directly in the parameters
+        # dictionary
+        self.sim_params.parameters['third'] = [1, 2, 3]
+        self.assertEqual(
+            len(self.sim_params.get_unpacked_params_list(use_cache=True)), 3)
+        self.sim_params.parameters['third'].append(4)
+        self.assertEqual(
+            [p['third'] for p in self.sim_params.get_unpacked_params_list(
+                use_cache=True)], [1, 2, 3, 4])
+        self.sim_params.parameters['second'] = 'new value'
+        self.assertEqual(
+            self.sim_params.get_unpacked_params_list(
+                use_cache=True)[0]['second'], 'new value')
+
+        self.sim_params.remove('third')
+        self.assertEqual(
+            self.sim_params.get_unpacked_params_list(use_cache=True),
+            [self.sim_params])
+
+    def test_iter_unpacked_params(self):
+        self.sim_params.add('third', np.array([1, 3, 2, 5]))
+        self.sim_params.add('fourth', ['A', 'B'])
+
+        # With no unpacked parameter the only element is the object itself
+        self.assertEqual(list(self.sim_params.iter_unpacked_params()),
+                         [self.sim_params])
+
+        self.sim_params.set_unpack_parameter('third')
+        self.sim_params.set_unpack_parameter('fourth')
+
+        unpacked_param_iter = self.sim_params.iter_unpacked_params()
+        # The SimulationParameters objects are created lazily
+        self.assertFalse(isinstance(unpacked_param_iter, list))
+        self.assertEqual(list(unpacked_param_iter),
+                         self.sim_params.get_unpacked_params_list())
+
+        # The order of the combinations follows the (sorted) names of the
+        # unpacked parameters
+        combinations = [(p['fourth'], p['third'])
+                        for p in self.sim_params.iter_unpacked_params()]
+        self.assertEqual(combinations, [('A', 1), ('A', 3), ('A', 2),
+                                        ('A', 5), ('B', 1), ('B', 3),
+                                        ('B', 2), ('B', 5)])
+
     def test_get_num_unpacked_variations(self):
         self.sim_params.add('third', np.array([1, 3, 2, 5]))
         self.sim_params.add('fourth', ['A', 'B'])
@@ -782,6 +877,40 @@ class SimulationParametersTestCase(unittest.TestCase):
         self.assertEqual(unpacked_list[index3]['fourth'], 'A')
         self.assertEqual(unpacked_list[index3]['fifth'], 'Z')
 
+    def test_get_value_index_map(self):
+        self.sim_params.add('third', np.array([1, 3, 2, 5]))
+        self.sim_params.add('fourth', ['A', 'B', 'A'])
+        self.sim_params.add('sixth', [[1, 2], [3]])
+
+        index_map = self.sim_params._get_value_index_map('third')
+        self.assertEqual(index_map, {1: 0, 3: 1, 2: 2, 5: 3})
+        # The map is cached
+        self.assertIs(self.sim_params._get_value_index_map('third'),
+                      index_map)
+        # The first index is used for repeated values
+        self.assertEqual(self.sim_params._get_value_index('fourth', 'A'), 0)
+        # Unhashable values can also be found
+        self.assertEqual(self.sim_params._get_value_index('sixth', [3]), 1)
+        with self.assertRaises(ValueError):
+            self.sim_params._get_value_index('third', 4)
+
+        # The cached map is not used if the parameter changes
+        self.sim_params.add('third', np.array([4, 1]))
+        self.assertEqual(self.sim_params._get_value_index('third', 4), 0)
+        self.sim_params.parameters['third'] = [7, 4]
+        self.assertEqual(self.sim_params._get_value_index('third', 4), 1)
+        # The cached map is also not used if the values change in place
+        self.sim_params.parameters['third'].append(9)
+        self.assertEqual(self.sim_params._get_value_index('third', 9), 2)
+        self.sim_params.parameters['third'][0] = 4
+        self.assertEqual(self.sim_params._get_value_index('third', 4), 0)
+        with self.assertRaises(ValueError):
+            self.sim_params._get_value_index('third', 7)
+        self.sim_params.add('third', np.array([1, 3, 2, 5]))
+        self.assertEqual(self.sim_params._get_value_index('third', 5), 3)
+        self.sim_params.parameters['third'][3] = 8
+        self.assertEqual(self.sim_params._get_value_index('third', 8), 3)
+
     def test_to_dict_and_from_dict(self):
         self.sim_params.add('third', np.array([1, 3, 2, 5]))
         self.sim_params.add('fourth', ['A', 'B'])
@@ -877,6 +1006,29 @@ class SimulationParametersTestCase(unittest.TestCase):
 
         # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 
+    def test_setstate(self):
+        self.sim_params.add('third', np.array([1, 3, 2, 5]))
+        self.sim_params.set_unpack_parameter('third')
+        self.assertFalse(hasattr(self.sim_params, '__dict__'))
+
+        # Objects pickled before __slots__ (and the value to index cache)
+        # were introduced have a dictionary state without the cache
+        old_state = self.sim_params.__getstate__()
+        del old_state['_value_index_cache']
+        sim_params = SimulationParameters.__new__(SimulationParameters)
+        sim_params.__setstate__(old_state)
+        self.assertEqual(sim_params, self.sim_params)
+        self.assertEqual(sim_params.get_pack_indexes({'third': 2}), [2])
+
+        # Attributes added by subclasses are also pickled
+        sim_params = _SimulationParametersWithDict()
+        sim_params.add('first', 10)
+        sim_params.extra = 'some value'
+        sim_params_copy = pickle.loads(pickle.dumps(sim_params))
+        self.assertIsInstance(sim_params_copy, _SimulationParametersWithDict)
+        self.assertEqual(sim_params_copy, sim_params)
+        self.assertEqual(sim_params_copy.extra, 'some value')
+
     def test_save_to_and_load_from_pickle_file(self):
         self.sim_params.add('third', np.array([1, 3, 2, 5]))
         self.sim_params.add('fourth', ['A', 'B'])
@@ -1214,6 +1366,15 @@ class ResultsModuleFunctionsTestCase(unittest.TestCase):
         # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 
 
+# Subclasses of Result with extra attributes, used to test pickling
+class _ResultWithSlot(Result):
+    __slots__ = ('extra', )
+
+
+class _ResultWithDict(Result):
+    pass
+
+
 class ResultTestCase(unittest.TestCase):
     """
     Unit-tests for the Result class in the results module.
@@ -1274,6 +1435,13 @@ class ResultTestCase(unittest.TestCase):
         self.result2.update(12, 8)
         self.assertEqual(self.result2.get_result(), 0.5)
 
+        # A RATIOTYPE result with a zero total is NaN
+        result_zero_total = Result('zero', Result.RATIOTYPE)
+        with np.errstate(invalid='ignore'):
+            result_zero_total.update_bulk([0], [0])
+        self.assertTrue(np.isnan(result_zero_total.get_result()))
+        self.assertEqual(repr(result_zero_total), "Result -> zero: 0/0 -> NaN")
+
         # Test the update function of the MISCTYPE. Note how we can store
         # anything.
         self.result3.update("First")
@@ -1363,6 +1531,84 @@ class ResultTestCase(unittest.TestCase):
         self.assertEqual(result4._value_list, [3, 1, 0, 3, 4])
         self.assertEqual(result4._total_list, [])
 
+    def test_getstate_and_setstate(self):
+        self.assertFalse(hasattr(self.result2, '__dict__'))
+        self.result2.update(3, 4)
+        state = self.result2.__getstate__()
+        self.assertEqual(state['_value'], 3)
+        self.assertEqual(state['_total'], 4)
+
+        result2 = Result.__new__(Result)
+        result2.__setstate__(state)
+        self.assertEqual(result2, self.result2)
+        self.assertEqual(result2.num_updates, 1)
+
+        # Attributes added by subclasses (in slots or in a __dict__) are
+        # also pickled
+        for result_class in [_ResultWithSlot, _ResultWithDict]:
+            result = result_class("name", Result.SUMTYPE)
+            result.update(3)
+            result.extra = 'some value'
+            result_copy = pickle.loads(pickle.dumps(result))
+            self.assertIsInstance(result_copy, result_class)
+            self.assertEqual(result_copy, result)
+            self.assertEqual(result_copy.extra, 'some value')
+
+    def test_update_bulk(self):
+        # The bulk update must be equivalent to updating with each value
+        values = np.array([13, 4, 7, 0])
+        totals = np.array([20, 10, 7, 5])
+        choices = np.array([3, 1, 0, 3, 4])
+        for accumulate in [False, True]:
+            expected_results = [
+                Result('name', Result.SUMTYPE, accumulate),
+                Result('name2', Result.RATIOTYPE, accumulate),
+                Result('name3', Result.MISCTYPE, accumulate),
+                Result('name4', Result.CHOICETYPE, accumulate, choice_num=5)
+            ]
+            for v, t in zip(values, totals):
+                expected_results[0].update(v)
+                expected_results[1].update(v, t)
+                expected_results[2].update(v)
+            for c in choices:
+                expected_results[3].update(int(c))
+
+            results = [
+                Result('name', Result.SUMTYPE, accumulate),
+                Result('name2', Result.RATIOTYPE, accumulate),
+                Result('name3', Result.MISCTYPE, accumulate),
+                Result('name4', Result.CHOICETYPE, accumulate, choice_num=5)
+            ]
+            results[0].update_bulk(values)
+            results[1].update_bulk(values, totals)
+            results[2].update_bulk(values)
+            results[3].update_bulk(choices)
+
+            for r, expected in zip(results, expected_results):
+                self.assertEqual(r, expected)
+                self.assertEqual(r.num_updates, expected.num_updates)
+            self.assertAlmostEqual(results[1].get_result_mean(),
+                                   expected_results[1].get_result_mean())
+
+        # Updating with no values does nothing
+        self.result1.update_bulk([])
+        self.assertEqual(self.result1.num_updates, 0)
+        self.assertEqual(self.result1._value, 0)
+
+        # The MISCTYPE can store anything
+        self.result3.update_bulk(["First", "Second"])
+        self.assertEqual(self.result3.get_result(), "Second")
+        self.assertEqual(self.result3.num_updates, 2)
+
+        with self.assertRaises(ValueError):
+            self.result2.update_bulk(values)
+        with self.assertRaises(ValueError):
+            self.result2.update_bulk(values, totals[:2])
+        with self.assertRaises(IndexError):
+            self.result4.update_bulk([0, 8])
+        with self.assertRaises(AssertionError):
+            self.result4.update_bulk([3.4])
+
     def test_create(self):
         r1 = Result.create(name='nome1',
                            update_type=Result.SUMTYPE,
@@ -1871,6 +2117,36 @@ class SimulationResultsTestCase(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.simresults.append_result(result1_wrong)
 
+    def test_append_result_and_merge(self):
+        self.simresults.append_result(
+            Result.create("lala", Result.SUMTYPE, 25))
+        # Adding a result replaces all the appended results with that name
+        self.simresults.add_new_result("lele", Result.RATIOTYPE, 1, 2)
+        self.assertEqual(len(self.simresults['lele']), 1)
+        self.assertEqual(self.simresults.get_result_names(),
+                         ['lala', 'lele', 'lulu'])
+
+        # Only the last appended Result is merged
+        self.simresults.merge_all_results(self.other_simresults)
+        self.assertEqual(len(self.simresults['lala']), 2)
+        self.assertEqual(self.simresults['lala'][0].get_result(), 13)
+        self.assertEqual(self.simresults['lala'][1].get_result(), 55)
+        self.assertEqual(self.simresults['lele'][0].get_result(), 5 / 12)
+
+        # Pickled objects from older versions stored a list of Result
+        # objects for each name in '_results'
+        old_state = self.simresults.__dict__.copy()
+        del old_state['_appended']
+        old_state['_results'] = {
+            n: self.simresults[n]
+            for n in self.simresults.get_result_names()
+        }
+        simresults = SimulationResults.__new__(SimulationResults)
+        simresults.__setstate__(old_state)
+        self.assertEqual(simresults, self.simresults)
+        self.assertEqual(len(simresults['lala']), 2)
+        self.assertEqual(len(simresults['lele']), 1)
+
     def test_append_all_results(self):
         self.simresults.append_all_results(self.other_simresults)
         # Note that self.simresults only has the 'lala' and 'lele' results.
@@ -1885,6 +2161,45 @@ class SimulationResultsTestCase(unittest.TestCase):
         self.assertEqual(len(self.simresults['lili']), 1)
         self.assertEqual(len(self.simresults['lulu']), 2)
 
+    def test_merge_scalars(self):
+        expected = SimulationResults()
+        expected.add_new_result('lala', Result.SUMTYPE, 13)
+        expected.add_new_result('lele', Result.RATIOTYPE, 3, 10)
+        expected.merge_all_results(self.other_simresults)
+
+        simresults = SimulationResults()
+        simresults.add_new_result('lala', Result.SUMTYPE, 13)
+        simresults.add_new_result('lele', Result.RATIOTYPE, 3, 10)
+        simresults.merge_scalars({'lala': 30, 'lele': (4, 10)})
+        self.assertEqual(simresults, expected)
+        self.assertEqual(simresults['lala'][0].num_updates, 2)
+
+        # Only results that were already added can be updated
+        with self.assertRaises(KeyError):
+            simresults.merge_scalars({'lili': 1})
+
+    def test_reset_values(self):
+        choice_value = self.simresults['lulu'][0]._value
+        self.simresults.reset_values()
+
+        self.assertEqual(set(self.simresults.get_result_names()),
+                         {'lala', 'lele', 'lulu'})
+        for results in self.simresults:
+            for r in results:
+                self.assertEqual(r.num_updates, 0)
+                self.assertEqual(r._total, 0)
+                self.assertEqual(r._result_sum, 0.0)
+                self.assertEqual(r._result_squared_sum, 0.0)
+
+        # A reset result is equal to a new result
+        self.assertEqual(self.simresults['lala'][0],
+                         Result('lala', Result.SUMTYPE))
+        self.assertEqual(self.simresults['lele'][-1],
+                         Result('lele', Result.RATIOTYPE))
+        # The numpy array of the CHOICETYPE is reused
+        self.assertIs(self.simresults['lulu'][0]._value, choice_value)
+        np.testing.assert_array_equal(choice_value, [0, 0, 0, 0, 0, 0])
+
     def test_merge_all_results(self):
         # Note that even though there is a 'lili' result in
         # self.other_simresults, only 'lala' and 'lele' will be
@@ -1910,6 +2225,26 @@ class SimulationResultsTestCase(unittest.TestCase):
         self.assertEqual(set(emptyresults.get_result_names()),
                          {'lala', 'lele', 'lulu'})
 
+        # The Result objects are copied and thus changing them in the
+        # merged SimulationResults object does not change emptyresults
+        lala_value = emptyresults['lala'][-1].get_result()
+        self.assertIsNot(emptyresults['lala'][-1], self.simresults['lala'][-1])
+        self.simresults.reset_values()
+        self.simresults['lala'][-1].update(1000)
+        self.assertEqual(emptyresults['lala'][-1].get_result(), lala_value)
+
+        # Appended results are also copied and the last one is still the
+        # one merged in the next call
+        simresults = SimulationResults()
+        simresults.add_new_result('lala', Result.SUMTYPE, 1)
+        simresults.append_result(Result.create('lala', Result.SUMTYPE, 2))
+        emptyresults = SimulationResults()
+        emptyresults.merge_all_results(simresults)
+        self.assertIsNot(emptyresults['lala'][-1], simresults['lala'][-1])
+        emptyresults.merge_all_results(simresults)
+        self.assertEqual(
+            [r.get_result() for r in emptyresults['lala']], [1, 4])
+
         # xxxxx Test the merge with the num_skipped_reps result xxxxxxxxxxx
         simresults1 = SimulationResults()
         simresults2 = SimulationResults()
@@ -2282,6 +2617,19 @@ def _delete_progressbar_output_files():  # pragma: no cover
             pass
 
 
+# Custom progress function "style" (see the
+# update_progress_function_style attribute of SimulationRunner) that
+# records the values it is called with. It is a class (instead of a local
+# function) so that runners using it can be pickled.
+class _ProgressRecorder:
+    def __init__(self):
+        self.values = []
+
+    def __call__(self, total, message):
+        self.values.append(total)
+        return self.values.append
+
+
 # Define a _DummyRunner class for the testing the simulate and
 # simulate_in_parallel methods in the SimulationRunner class.
 class _DummyRunner(SimulationRunner):
@@ -2304,16 +2652,107 @@ class _DummyRunner(SimulationRunner):
         value = 1.2 * SNR + bias + extra
         return value
 
+    def calc_current_result(self, current_params):
+        # The correct result will be SNR * 1.2 + 1.3 + extra
+        return self.calc_result(current_params['SNR'], current_params['bias'],
+                                current_params['extra'])
+
     def _run_simulation(self, current_params):
-        SNR = current_params['SNR']
-        bias = current_params['bias']
-        extra = current_params['extra']
         sim_results = SimulationResults()
+        value = self.calc_current_result(current_params)
+        sim_results.add_new_result('lala', Result.RATIOTYPE, value, 1)
+        return sim_results
 
-        value = self.calc_result(SNR, bias, extra)
 
-        # The correct result will be SNR * 1.2 + 1.3 + extra
-        sim_results.add_new_result('lala', Result.RATIOTYPE, value, 1)
+class _DummyRunnerWithOut(_DummyRunner):
+    def __init__(self):
+        super().__init__()
+        # The objects passed as the 'out' argument of _run_simulation
+        self.reused_results = []
+
+    def _run_simulation(self, current_params, out=None):
+        if out is None:
+            return super()._run_simulation(current_params)
+
+        self.reused_results.append(out)
+        out['lala'][-1].update(self.calc_current_result(current_params), 1)
+        return out
+
+
+class _DummyRunnerWithScalars(_DummyRunner):
+    def __init__(self):
+        super().__init__()
+        # Number of repetitions that returned a dict
+        self.num_dicts = 0
+
+    def _run_simulation(self, current_params, out=None):
+        if out is None:
+            return super()._run_simulation(current_params)
+        self.num_dicts += 1
+        return {'lala': (self.calc_current_result(current_params), 1)}
+
+
+class _DummyRunnerScalarsAfterFirst(_DummyRunner):
+    # Returns a dict in every repetition after the first one, without
+    # accepting the 'out' argument
+    def __init__(self):
+        super().__init__()
+        self.result_name = 'lala'
+        self._is_first_rep = True
+
+    def _on_simulate_current_params_start(self, current_params):
+        self._is_first_rep = True
+
+    def _run_simulation(self, current_params):
+        if self._is_first_rep:
+            self._is_first_rep = False
+            return super()._run_simulation(current_params)
+        return {self.result_name: (self.calc_current_result(current_params),
+                                   1)}
+
+
+class _DummyRunnerOnlyScalars(_DummyRunner):
+    # Wrong implementation that returns a dict even in the first
+    # repetition, when there is no SimulationResults to merge it into
+    def _run_simulation(self, current_params, out=None):
+        return {'lala': (self.calc_current_result(current_params), 1)}
+
+
+class _DummyRunnerLowBER(_DummyRunner):
+    def __init__(self):
+        super().__init__()
+        self.num_runs = 0
+
+    def _run_simulation(self, current_params):
+        # The first bit error only happens in the 20th repetition
+        self.num_runs += 1
+        sim_results = SimulationResults()
+        sim_results.add_new_result('ber', Result.RATIOTYPE,
+                                   int(self.num_runs == 20), 100)
+        return sim_results
+
+
+class _ObjectWithRandomState:
+    def __init__(self, seed):
+        self.RS = np.random.RandomState(seed)
+
+
+class _DummyRunnerWithRandomState(_DummyRunner):
+    def __init__(self):
+        super().__init__()
+        # Random number generator held by the runner itself and by another
+        # object (such as a channel object)
+        self.RS = np.random.RandomState(123)
+        self.channel = _ObjectWithRandomState(456)
+
+    def _run_simulation(self, current_params):
+        sim_results = SimulationResults()
+        for name, value in [('runner_rs', self.RS.rand()),
+                            ('channel_rs', self.channel.RS.rand()),
+                            ('global_rs', np.random.rand())]:
+            sim_results.add_result(
+                Result.create(name, Result.SUMTYPE, value,
+                              accumulate_values=True))
         return sim_results
 
 
@@ -2545,6 +2984,302 @@ class SimulationRunnerTestCase(unittest.TestCase):
         # Delete the pickle files in the same folder
         _delete_pickle_files()
 
+    def test_simulate_with_process_pool(self):
+        # Simulate the parameters combinations in a pool with two worker
+        # processes
+        dummyrunner = _DummyRunner()
+        dummyrunner.n_jobs = 2
+        dummyrunner.set_results_filename('dummyrunner_pool_results')
+        dummyrunner.simulate()
+
+        # The results must be the same (and in the same order) as the ones
+        # obtained in a serial simulation
+        dummyrunner2 = _DummyRunner()
+        dummyrunner2.simulate()
+        self.assertEqual(dummyrunner.results, dummyrunner2.results)
+        self.assertEqual(dummyrunner.runned_reps, [2] * 10)
+
+        # The partial results saved by the worker processes must have been
+        # deleted (since delete_partial_results_bool is True)
+        self.assertEqual(
+            glob.glob('partial_results/dummyrunner_pool_results_*'), [])
+
+        sim_results = SimulationResults.load_from_file(
+            dummyrunner.results_filename)
+        self.assertEqual(sim_results, dummyrunner.results)
+
+        # A custom progress function must also be used with the pool of
+        # worker processes. It is called (in the current process) with
+        # the number of finished parameters combinations.
+        progress_recorder = _ProgressRecorder()
+        dummyrunner3 = _DummyRunner()
+        dummyrunner3.n_jobs = 2
+        dummyrunner3.update_progress_function_style = progress_recorder
+        dummyrunner3.simulate()
+        self.assertEqual(progress_recorder.values, [10] + list(range(1, 11)))
+
+        # Each combination of parameters must use different random values,
+        # even with the global random number generator seeded
+        np.random.seed(0)
+        random_runner = _DummyRunnerWithRandomState()
+        random_runner.n_jobs = 2
+        random_runner.simulate()
+        for name in ['runner_rs', 'channel_rs', 'global_rs']:
+            samples = [
+                r.get_result_accumulated_values()[0]
+                for r in random_runner.results[name]
+            ]
+            self.assertEqual(len(set(samples)), 10)
+
+        # The repetitions of each combination of parameters are run
+        # serially in the worker processes
+        dummyrunner4 = _DummyRunner()
+        dummyrunner4.reps_n_jobs = 2
+        current_params = dummyrunner4.params.get_unpacked_params_list()[0]
+        worker_runner = copy(dummyrunner4)
+        _, sim_results, _ = \
+            SimulationRunner._simulate_for_current_params_in_pool(
+                worker_runner, current_params, 0)
+        self.assertEqual(worker_runner.reps_n_jobs, 1)
+        self.assertEqual(sim_results['lala'], dummyrunner2.results['lala'][:1])
+
+        _delete_pickle_files()
+
+    def test_simulate_reps_with_process_pool(self):
+        # Run the repetitions of each parameters combination in a pool
+        # with two worker processes
+        dummyrunner = _DummyRunner()
+        dummyrunner.rep_max = 7
+        dummyrunner.reps_n_jobs = 2
+        self.assertTrue(dummyrunner._can_simulate_reps_in_parallel(1))
+        dummyrunner.simulate()
+
+        dummyrunner2 = _DummyRunner()
+        dummyrunner2.rep_max = 7
+        dummyrunner2.simulate()
+        self.assertEqual(dummyrunner.runned_reps, [7] * 10)
+        self.assertEqual(dummyrunner.results, dummyrunner2.results)
+        for r in dummyrunner.results['lala']:
+            self.assertEqual(r.num_updates, 7)
+
+        # Each chunk of repetitions must use different random values, for
+        # the global random number generator as well as for the ones held
+        # by the runner
+        random_runner = _DummyRunnerWithRandomState()
+        random_runner.rep_max = 9
+        random_runner.reps_n_jobs = 2
+        random_runner.simulate()
+        for name in ['runner_rs', 'channel_rs', 'global_rs']:
+            for r in random_runner.results[name]:
+                samples = r.get_result_accumulated_values()
+                self.assertEqual(len(samples), 9)
+                self.assertEqual(len(set(samples)), 9)
+
+        # The same seed gives the same random values and different seeds
+        # give different ones
+        current_params = random_runner.params.get_unpacked_params_list()[0]
+        all_samples = []
+        for seed in [10, 10, 11]:
+            sim_results, _ = SimulationRunner._simulate_reps_in_worker(
+                copy(random_runner), current_params, 2, seed)
+            all_samples.append([
+                sim_results[name][0].get_result_accumulated_values()
+                for name in ['runner_rs', 'channel_rs', 'global_rs']
+            ])
+        self.assertEqual(all_samples[0], all_samples[1])
+        for samples0, samples2 in zip(all_samples[0], all_samples[2]):
+            self.assertNotEqual(samples0, samples2)
+
+        # Repetitions where a SkipThisOne exception is raised are not
+        # counted by the workers
+        runner_with_skip = _DummyRunnerWithSkip()
+        current_params = runner_with_skip.params.get_unpacked_params_list()[0]
+        sim_results, num_skipped = \
+            SimulationRunner._simulate_reps_in_worker(
+                runner_with_skip, current_params, 3)
+        self.assertEqual(num_skipped, 2)
+        self.assertEqual(sim_results['lala'][0].num_updates, 3)
+
+        # If _keep_going is reimplemented the repetitions are not run in
+        # parallel
+        class _DummyRunnerWithKeepGoing(_DummyRunner):
+            def _keep_going(self, current_params, current_sim_results,
+                            current_rep):
+                return True
+
+        dummyrunner3 = _DummyRunnerWithKeepGoing()
+        dummyrunner3.reps_n_jobs = 2
+        self.assertFalse(dummyrunner3._can_simulate_reps_in_parallel(1))
+
+    def test_simulate_with_convergence_criterion(self):
+        # The result of _DummyRunner is the same in every repetition and
+        # thus it converges as soon as convergence_window repetitions are
+        # run after the first one
+        dummyrunner = _DummyRunner()
+        dummyrunner.rep_max = 50
+        dummyrunner.reps_n_jobs = 2
+        dummyrunner.target_relative_precision = 1e-3
+        dummyrunner.convergence_result_name = 'lala'
+        dummyrunner.convergence_window = 3
+        self.assertFalse(dummyrunner._can_simulate_reps_in_parallel(1))
+        dummyrunner.simulate()
+        self.assertEqual(dummyrunner.runned_reps, [4] * 10)
+
+        dummyrunner2 = _DummyRunner()
+        dummyrunner2.rep_max = 4
+        dummyrunner2.simulate()
+        self.assertEqual(dummyrunner.results['lala'],
+                         dummyrunner2.results['lala'])
+
+        # The simulation continues while the relative change in the window
+        # is greater than the target precision
+        current_params = dummyrunner.params.get_unpacked_params_list()[0]
+        dummyrunner._convergence_values.extend([2.0, 2.001, 2.01, 2.0])
+        self.assertTrue(
+            dummyrunner._keep_going(current_params, dummyrunner.results, 4))
+        dummyrunner.target_relative_precision = 1e-2
+        self.assertFalse(
+            dummyrunner._keep_going(current_params, dummyrunner.results, 4))
+        # The criterion is only checked after min_reps repetitions
+        dummyrunner.min_reps = 5
+        self.assertTrue(
+            dummyrunner._keep_going(current_params, dummyrunner.results, 4))
+        self.assertFalse(
+            dummyrunner._keep_going(current_params, dummyrunner.results, 5))
+        # A zero reference value or a non finite value never converges
+        for values in [[0.0, 0.0, 0.0, 0.0], [np.nan, np.nan, np.nan, 2.0],
+                       [2.0, 2.0, np.nan, 2.0]]:
+            dummyrunner._convergence_values.extend(values)
+            self.assertTrue(
+                dummyrunner._keep_going(current_params, dummyrunner.results,
+                                        5))
+        # Without the convergence criterion it always continues
+        dummyrunner.convergence_result_name = None
+        self.assertTrue(
+            dummyrunner._keep_going(current_params, dummyrunner.results, 4))
+
+        # A low error rate, with no errors in the first repetitions, must
+        # not be considered converged before the first error
+        low_ber_runner = _DummyRunnerLowBER()
+        low_ber_runner.params.remove('SNR')
+        low_ber_runner.params.remove('extra')
+        low_ber_runner.rep_max = 40
+        low_ber_runner.target_relative_precision = 1e-3
+        low_ber_runner.convergence_result_name = 'ber'
+        low_ber_runner.convergence_window = 3
+        low_ber_runner.simulate()
+        self.assertEqual(low_ber_runner.runned_reps, [40])
+        self.assertGreater(low_ber_runner.results['ber'][0].get_result(), 0)
+
+    def test_progress_update_interval(self):
+        progress_values = []
+
+        def get_update_progress_func(rep_max, message):
+            return progress_values.append
+
+        dummyrunner = _DummyRunner()
+        dummyrunner.params.set_unpack_parameter('SNR', False)
+        dummyrunner.params.set_unpack_parameter('extra', False)
+        dummyrunner.params.add('SNR', 10.)
+        dummyrunner.params.add('extra', 2.2)
+        dummyrunner.rep_max = 1000
+        dummyrunner.update_progress_function_style = get_update_progress_func
+        # By default the progress is updated every rep_max // 200
+        # repetitions and once more at the end
+        dummyrunner.simulate()
+        self.assertEqual(progress_values, list(range(5, 1001, 5)) + [1000])
+
+        progress_values.clear()
+        dummyrunner.rep_max = 10
+        dummyrunner.progress_update_interval = 4
+        dummyrunner.simulate()
+        self.assertEqual(progress_values, [4, 8, 10])
+
+    def test_simulate_reusing_results(self):
+        dummyrunner = _DummyRunner()
+        dummyrunner.rep_max = 4
+        self.assertFalse(dummyrunner._can_reuse_results())
+        dummyrunner.simulate()
+
+        dummyrunner2 = _DummyRunnerWithOut()
+        dummyrunner2.rep_max = 4
+        self.assertTrue(dummyrunner2._can_reuse_results())
+        dummyrunner2.simulate()
+
+        # The first repetition of each parameters combination creates new
+        # results, which are then reused (a copy of them in the second
+        # repetition) in the remaining repetitions
+        self.assertEqual(len(dummyrunner2.reused_results), 3 * 10)
+        self.assertEqual(len({id(r) for r in dummyrunner2.reused_results}),
+                         10)
+        self.assertEqual(dummyrunner2.results, dummyrunner.results)
+        for r in dummyrunner2.results['lala']:
+            self.assertEqual(r.num_updates, 4)
+
+    def test_simulate_merging_scalars(self):
+        dummyrunner = _DummyRunner()
+        dummyrunner.rep_max = 4
+        dummyrunner.simulate()
+
+        dummyrunner2 = _DummyRunnerWithScalars()
+        dummyrunner2.rep_max = 4
+        dummyrunner2.simulate()
+        self.assertEqual(dummyrunner2.results, dummyrunner.results)
+        for r in dummyrunner2.results['elapsed_time']:
+            self.assertEqual(r.num_updates, 4)
+        # Every repetition after the first one returned a dict
+        self.assertEqual(dummyrunner2.num_dicts, 3 * 10)
+
+        # A dict can also be returned without the 'out' argument
+        dummyrunner4 = _DummyRunnerScalarsAfterFirst()
+        dummyrunner4.rep_max = 4
+        dummyrunner4.simulate()
+        self.assertEqual(dummyrunner4.results, dummyrunner.results)
+
+        # The same happens when the repetitions run in worker processes
+        current_params = dummyrunner2.params.get_unpacked_params_list()[0]
+        sim_results, _ = SimulationRunner._simulate_reps_in_worker(
+            dummyrunner2, current_params, 4)
+        self.assertEqual(sim_results['lala'], dummyrunner.results['lala'][:1])
+
+        # The first repetition must return a SimulationResults object
+        dummyrunner3 = _DummyRunnerOnlyScalars()
+        with self.assertRaises(TypeError):
+            dummyrunner3.simulate()
+        with self.assertRaises(TypeError):
+            SimulationRunner._simulate_reps_in_worker(dummyrunner3,
+                                                      current_params, 4)
+
+        # The names in the dict must be the ones of the previous results
+        dummyrunner4.result_name = 'lolo'
+        with self.assertRaises(TypeError):
+            dummyrunner4.simulate()
+        dummyrunner4._is_first_rep = True
+        with self.assertRaises(TypeError):
+            SimulationRunner._simulate_reps_in_worker(dummyrunner4,
+                                                      current_params, 4)
+
+    def test_jit_kernel(self):
+        def count_errors(sent, received):  # pragma: no cover
+            num_errors = 0
+            for i in range(sent.size):
+                if sent[i] != received[i]:
+                    num_errors += 1
+            return num_errors
+
+        # The function is defined inside the test and thus its compiled
+        # code cannot be cached
+        kernel = SimulationRunner._jit_kernel(count_errors, cache=False)
+        sent = np.array([0, 1, 1, 0, 1, 0])
+        received = np.array([0, 0, 1, 1, 1, 0])
+        self.assertEqual(kernel(sent, received), 2)
+        self.assertEqual(kernel(sent, sent), 0)
+        if runner.HAS_NUMBA:
+            self.assertIsNot(kernel, count_errors)
+            self.assertIs(kernel.py_func, count_errors)
+        else:  # pragma: no cover
+            self.assertIs(kernel, count_errors)
+
     def test_simulate_with_param_variation_index(self):
         # Test the "simulate" method when the param_variation_index
         # argument is specified.
@@ -3310,6 +4045,22 @@ class ProgressbarMultiProcessTextTestCase(unittest.TestCase):
         self.assertEqual(self.mpbar._start_updater_count, 0)
         self.assertFalse(self.mpbar.running.is_set())
 
+    def test_stop_updater_does_not_wait_sleep_time(self):
+        mpbar = progressbar.ProgressbarMultiProcessServer(
+            message="Some message",
+            sleep_time=30,
+            filename=self.output_filename)
+        mpbar.register_client_and_get_proxy_progressbar(10)
+        mpbar.start_updater()
+        sleep(0.1)
+
+        # The updater process is blocked waiting for the next update, but
+        # it must finish right away when stop_updater is called
+        tic = time()
+        mpbar.stop_updater(timeout=10)
+        self.assertLess(time() - tic, 5)
+        self.assertFalse(mpbar._update_process.is_alive())
+
 
 # TODO: finish implementation
 class ProgressbarZMQTextTestCase(unittest.TestCase):
@@ -14,7 +14,7 @@ import unittest
 
 import numpy as np
 
-from pyphysim.util import conversion, misc, serialize
+from pyphysim.util import _ia_kernels, conversion, misc, serialize
 
 
 # noinspection PyMethodMayBeStatic
@@ -31,6 +31,10 @@ class UtilDoctestsTestCase(unittest.TestCase):
         """Run conversion doctests"""
         doctest.testmod(conversion)
 
+    def test_ia_kernels(self):
+        """Run _ia_kernels doctests"""
+        doctest.testmod(_ia_kernels)
+
 
 # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 # xxxxxxxxxxxxxxx Conversion Module xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
@@ -457,6 +461,48 @@ class MiscFunctionsTestCase(unittest.TestCase):
         invB = misc.update_inv_sum_diag(invA, D.diagonal())
         np.testing.assert_array_almost_equal(expected_invB, invB)
 
+    def test_batched_herk(self):
+        # Small matrices (np.matmul is used)
+        A = misc.randn_c(4, 2, 3)
+        expected = np.stack([Ai.dot(Ai.conj().T) for Ai in A])
+        np.testing.assert_array_almost_equal(misc.batched_herk(A), expected)
+
+        # Large matrices (the BLAS herk routine is used)
+        A = misc.randn_c(2, 3, 40, 10)
+        out = misc.batched_herk(A)
+        self.assertEqual(out.shape, (2, 3, 40, 40))
+        for i in range(2):
+            for j in range(3):
+                np.testing.assert_array_almost_equal(
+                    out[i, j], A[i, j].dot(A[i, j].conj().T))
+
+        # Single real matrix (the BLAS syrk routine is used)
+        A = np.random.randn(40, 5)
+        np.testing.assert_array_almost_equal(misc.batched_herk(A), A.dot(A.T))
+
+    def test_randn_c(self):
+        a = misc.randn_c(500, 200)
+        self.assertEqual(a.shape, (500, 200))
+        self.assertEqual(a.dtype, np.complex128)
+        # Real and imaginary parts are independent with variance 0.5
+        self.assertAlmostEqual(np.var(a.real), 0.5, delta=0.02)
+        self.assertAlmostEqual(np.var(a.imag), 0.5, delta=0.02)
+        self.assertAlmostEqual(np.mean(a.real * a.imag), 0.0, delta=0.02)
+
+        self.assertEqual(misc.randn_c(3, dtype=np.complex64).dtype,
+                         np.complex64)
+        self.assertTrue(np.iscomplexobj(misc.randn_c()))
+
+        # The same RandomState seed must give the same samples
+        b1 = misc.randn_c_RS(np.random.RandomState(123), 4, 3)
+        b2 = misc.randn_c_RS(np.random.RandomState(123), 4, 3)
+        np.testing.assert_array_equal(b1, b2)
+        b3 = misc.randn_c_RS(np.random.RandomState(123),
+                             4,
+                             3,
+                             dtype=np.complex64)
+        np.testing.assert_array_almost_equal(b3, b1, decimal=6)
+
     def test_get_principal_component_matrix(self):
         A = np.array([[0.03300776 - 0.77428109j, 0.13839634 + 0.24361978j],
                       [-0.07248757 + 0.35349072j, -0.04558698 - 0.12223548j],
@@ -716,6 +762,71 @@ class MiscFunctionsTestCase(unittest.TestCase):
                                misc.calc_shannon_sum_capacity(sinrs_linear))
 
 
+# xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+# xxxxxxxxxxxxxxx IA Kernels Module xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+# xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
+class IAKernelsTestCase(unittest.TestCase):
+    def setUp(self):
+        """Called before each test."""
+        K, Nr, Nt, Ns = 3, 4, 3, 2
+        self.K = K
+        self.H_all_kl = misc.randn_c(K, K, Nr, Nt)
+        self.F = misc.randn_c(K, Nt, Ns)
+        self.C = np.stack(
+            [np.linalg.qr(misc.randn_c(Nr, Nr - Ns))[0] for _ in range(K)])
+
+    def test_pack_stack(self):
+        arrays = [misc.randn_c(2, 3), misc.randn_c(4, 1), misc.randn_c(1, 2)]
+        out = _ia_kernels.pack_stack(arrays)
+        self.assertEqual(out.shape, (3, 4, 3))
+        for A, B in zip(arrays, out):
+            np.testing.assert_array_equal(B[:A.shape[0], :A.shape[1]], A)
+            self.assertEqual(np.count_nonzero(B), A.size)
+
+        # Zero padding must not change the cost
+        H_all_kl = self.H_all_kl.copy()
+        C = self.C.copy()
+        H_all_kl[:, :, 3] = 0.0
+        C[:, 3] = 0.0
+        expected = _ia_kernels.compute_cost(H_all_kl, self.F, C)
+        ragged_H = [
+            H_all_kl[k, l, :3] for k in range(self.K) for l in range(self.K)
+        ]
+        padded_H = _ia_kernels.pack_stack(ragged_H).reshape(
+            self.K, self.K, 3, 3)
+        padded_C = _ia_kernels.pack_stack([Ck[:3] for Ck in C])
+        self.assertAlmostEqual(
+            _ia_kernels.compute_cost(padded_H, self.F, padded_C), expected)
+
+    def test_compute_cost(self):
+        expected = 0.0
+        for k in range(self.K):
+            P = np.eye(self.C.shape[1]) - self.C[k].dot(self.C[k].conj().T)
+            for l in range(self.K):
+                if l != k:
+                    X = self.H_all_kl[k, l].dot(self.F[l])
+                    expected += np.linalg.norm(P.dot(X), 'fro')**2
+
+        self.assertAlmostEqual(
+            _ia_kernels._compute_cost_numpy(self.H_all_kl, self.F, self.C),
+            expected)
+        self.assertAlmostEqual(
+            _ia_kernels.compute_cost(self.H_all_kl, self.F, self.C), expected)
+        if _ia_kernels.HAS_NUMBA:
+            X_all = np.empty((self.K, self.H_all_kl.shape[2], self.F.shape[2]),
+                             dtype=complex)
+            self.assertAlmostEqual(
+                _ia_kernels._compute_cost_numba(self.H_all_kl, self.F,
+                                                self.C, X_all), expected)
+
+        # Single precision inputs
+        self.assertAlmostEqual(_ia_kernels.compute_cost(
+            self.H_all_kl.astype(np.complex64), self.F.astype(np.complex64),
+            self.C.astype(np.complex64)),
+                               expected,
+                               places=4)
+
+
 # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 # xxxxxxxxxxxxxxx Serialize Module xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx
 # xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx